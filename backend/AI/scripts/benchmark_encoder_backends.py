@@ -0,0 +1,128 @@
+"""
+Benchmark the embedding backends (PyTorch, ONNX Runtime, ONNX Runtime int8) and
+check that they agree with PyTorch.
+
+A sample of HS texts from hs_meta.parquet serves as queries. Each backend is
+loaded through the services' embedding registry, so a passing run is a fair
+check that EMBEDDING_BACKEND=<backend> will work. For each backend the
+script reports:
+
+- single-query latency (p50/p95), as in /suggest-hs;
+- throughput encoding all queries in batches of --batch-size, as in /suggest-hs/batch;
+- parity with PyTorch: cosine similarity of each query embedding with the PyTorch
+  one (mean/min), and top-1/top-5 agreement of searches against embeddings.npy.
+
+Exits with status 1 if a backend's worst cosine drift (1 - min cosine)
+exceeds --max-drift.
+
+Parity is measured on hs_meta texts, not real queries, and means little with
+a randomly initialized model. It does not show ranking quality: for that, run
+evaluate_hs_search.py --backends torch,onnx,onnx-int8 (recall@k on the
+labelled query set) with the real encoder.
+
+Usage:
+    python export_onnx_encoder.py
+    python benchmark_encoder_backends.py --rows 1000 --backends torch,onnx,onnx-int8
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'services')))
+
+from common.embedding_registry import DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS, get_embedding_model
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+
+
+def _normalize(x):
+    x = np.asarray(x, dtype='float32')
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def _top(scores, k):
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run_benchmark(n_rows, backends, batch_size, latency_queries, max_drift, model_name=DEFAULT_MODEL_NAME):
+    meta = pd.read_parquet(os.path.join(MODELS_DIR, 'hs_meta.parquet'))
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(meta), size=min(n_rows, len(meta)), replace=False)
+    queries = meta['text'].astype(str).iloc[rows].tolist()
+    corpus_path = os.path.join(MODELS_DIR, 'embeddings.npy')
+    corpus = np.load(corpus_path, mmap_mode='r') if os.path.exists(corpus_path) else None
+    print(f'{len(queries):,} queries from hs_meta.parquet, {os.cpu_count()} CPU cores visible')
+
+    results = []
+    reference = None
+    for backend in backends:
+        started = time.perf_counter()
+        model = get_embedding_model(model_name, backend)
+        load_s = time.perf_counter() - started
+        model.encode(queries[:batch_size], batch_size=batch_size)  # warm-up
+
+        latencies = []
+        for q in queries[:latency_queries]:
+            started = time.perf_counter()
+            model.encode([q])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        emb = _normalize(model.encode(queries, batch_size=batch_size, convert_to_numpy=True))
+        throughput = len(queries) / (time.perf_counter() - started)
+
+        if reference is None:
+            reference = emb
+            reference_top = _top(emb @ np.asarray(corpus).T, 5) if corpus is not None else None
+        cosine = np.sum(emb * reference, axis=1)
+        top1 = top5 = None
+        if corpus is not None:
+            top = _top(emb @ np.asarray(corpus).T, 5)
+            top1 = float(np.mean(top[:, 0] == reference_top[:, 0]))
+            top5 = float(np.mean([len(set(a) & set(b)) / 5 for a, b in zip(top, reference_top)]))
+        results.append({
+            'backend': backend,
+            'load_s': load_s,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'throughput': throughput,
+            'cos_mean': float(cosine.mean()),
+            'cos_min': float(cosine.min()),
+            'top1': top1,
+            'top5': top5,
+        })
+
+    print(f'\n{"backend":>10} {"load s":>7} {"p50 ms":>7} {"p95 ms":>7} {"queries/s":>10} '
+          f'{"cos mean":>9} {"cos min":>8} {"top-1 agr":>9} {"top-5 agr":>9}')
+    failed = []
+    for r in results:
+        fmt = lambda v: '–' if v is None else f'{v:.3f}'
+        print(f'{r["backend"]:>10} {r["load_s"]:>7.2f} {r["p50_ms"]:>7.2f} {r["p95_ms"]:>7.2f} {r["throughput"]:>10.1f} '
+              f'{r["cos_mean"]:>9.5f} {r["cos_min"]:>8.5f} {fmt(r["top1"]):>9} {fmt(r["top5"]):>9}')
+        if 1 - r['cos_min'] > max_drift:
+            failed.append(r['backend'])
+    print(f'\nParity baseline: {backends[0]}; max allowed drift (1 - min cosine): {max_drift}')
+    if failed:
+        print(f'FAIL: drift above {max_drift} for {", ".join(failed)}')
+    return not failed
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark embedding backends and check parity with PyTorch')
+    parser.add_argument('--rows', type=int, default=1000, help='Queries sampled from hs_meta.parquet')
+    parser.add_argument('--backends', default=','.join(EMBEDDING_BACKENDS),
+                        help='Comma-separated backends; the first is the parity baseline')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--latency-queries', type=int, default=200, help='Single-query encodes timed')
+    parser.add_argument('--max-drift', type=float, default=0.05)
+    args = parser.parse_args()
+
+    ok = run_benchmark(args.rows, [b.strip() for b in args.backends.split(',')], args.batch_size,
+                       args.latency_queries, args.max_drift)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,153 @@
+"""
+Microbenchmark of DocumentValidator field extraction on long documents.
+
+Compares the single-pass `FieldExtractor` with the previous implementation
+(one `re.search` per field, kept below as `legacy_extract_fields`) on
+generated packing lists:
+
+- header: all fields on page 1 (the common case; both stop early);
+- trailer: all fields on the last page;
+- missing: no destination or transport mode anywhere (every scan runs to the end).
+
+Before timing, both implementations must agree on these documents and on a
+randomized corpus of anchor-heavy snippets; the script exits 1 if they don't.
+
+Usage:
+    python benchmark_field_extraction.py --pages 100 --repeats 20
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+SERVICES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'services'))
+sys.path.insert(0, os.path.join(SERVICES_DIR, 'document_validator'))
+
+from field_extractor import FieldExtractor  # noqa: E402
+
+HEADER = [
+    'commercial invoice / packing list',
+    'hs code: 847130',
+    'product description: portable laptop computers, 14 inch, with charger',
+    'quantity: 250',
+    'gross weight: 1250.5 kg',
+    'package type: cartons on pallets',
+    'country of origin: china',
+    'destination country: germany',
+    'mode of transport: sea freight',
+]
+
+
+def legacy_extract_fields(text):
+    """The per-field `re.search` extraction the validator used before FieldExtractor."""
+    text_lower = text.lower()
+    fields = {}
+    hs_match = re.search(r'(?:hs\s+code|hs\s+code|product\s+code)[\s:]+(\d{6,8})', text_lower)
+    if not hs_match:
+        hs_match = re.search(r'\b(\d{6,8})\b', text)
+    fields['hs_code'] = hs_match.group(1) if hs_match else None
+    prod_match = re.search(
+        r'(?:product\s+description|product\s+name|item\s+description)[\s:]+([^\n]{10,200})', text_lower)
+    fields['product_description'] = prod_match.group(1).strip() if prod_match else None
+    qty_match = re.search(r'(?:quantity|total\s+quantity|number\s+of\s+items?)[\s:]+(\d+(?:\.\d+)?)', text_lower)
+    fields['quantity'] = qty_match.group(1) if qty_match else None
+    weight_match = re.search(
+        r'(?:gross\s+weight|net\s+weight|total\s+weight|weight)[\s:]+(\d+(?:\.\d+)?)', text_lower)
+    fields['weight'] = weight_match.group(1) if weight_match else None
+    pkg_match = re.search(r'(?:package\s+type|packaging|container\s+type)[\s:]+([^\n]{3,50})', text_lower)
+    fields['package_type'] = pkg_match.group(1).strip() if pkg_match else None
+    origin_match = re.search(
+        r'(?:country\s+of\s+origin|origin\s+country|made\s+in|manufactured\s+in)[\s:]+([^\n]{2,50})', text_lower)
+    fields['origin_country'] = origin_match.group(1).strip() if origin_match else None
+    dest_match = re.search(
+        r'(?:destination\s+country|country\s+of\s+destination|ship\s+to|consignee\s+country)[\s:]+([^\n]{2,50})',
+        text_lower)
+    fields['destination_country'] = dest_match.group(1).strip() if dest_match else None
+    mode_match = re.search(
+        r'(?:mode\s+of\s+transport|transportation\s+mode|method\s+of\s+transport|shipment\s+mode)[\s:]+([^\n]{3,30})',
+        text_lower)
+    fields['mode_of_transport'] = mode_match.group(1).strip() if mode_match else None
+    return fields
+
+
+def _item_lines(page, per_page=65):
+    return [f'item {page * per_page + i:05d} carton {i % 97:02d} laptop computer net weight per unit kg '
+            f'serial sn{(page * per_page + i) * 7919 % 10**8:08d}' for i in range(per_page)]
+
+
+def sample_documents(n_pages):
+    """name -> normalized text (one line per page, as ocr.py produces)."""
+    body = [' '.join(_item_lines(page)) for page in range(n_pages)]
+    header = ' '.join(HEADER)
+    partial = ' '.join(line for line in HEADER if not line.startswith(('destination', 'mode')))
+    return {
+        'header': ' '.join([header] + body[1:]),
+        'trailer': ' '.join(body[:-1] + [header]),
+        'missing': ' '.join([partial] + body[1:]),
+    }
+
+
+def random_snippets(n, seed=0):
+    """Short texts mixing anchors, separators and values in random order, to compare edge cases."""
+    rng = random.Random(seed)
+    words = ['hs code', 'product code', 'product description', 'product name', 'item description', 'quantity',
+             'total quantity', 'number of items', 'number of item', 'gross weight', 'net weight', 'total weight',
+             'weight', 'package type', 'packaging', 'container type', 'country of origin', 'origin country',
+             'made in', 'manufactured in', 'destination country', 'country of destination', 'ship to',
+             'consignee country', 'mode of transport', 'transportation mode', 'method of transport',
+             'shipment mode', 'ship', 'mode', 'code', 'HS  Code', 'Gross\tWeight', 'items']
+    values = ['847130', '12345678', '123456789', '12', '3.5', 'x', 'china', 'sea freight', 'cartons on pallets',
+              'laptops and accessories', '']
+    separators = [': ', ' ', ':', '\n', ' - ', '  :  ', '']
+    snippets = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            parts += [rng.choice(words), rng.choice(separators), rng.choice(values), rng.choice([' ', '\n', ', '])]
+        snippets.append(''.join(parts))
+    return snippets
+
+
+def _best_ms(fn, text, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(text)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(n_pages, repeats, fuzz):
+    extractor = FieldExtractor()
+    documents = sample_documents(n_pages)
+
+    mismatches = [name for name, text in documents.items()
+                  if extractor.extract(text) != legacy_extract_fields(text)]
+    mismatches += [repr(s) for s in random_snippets(fuzz) if extractor.extract(s) != legacy_extract_fields(s)]
+    if mismatches:
+        print(f'FieldExtractor disagrees with the per-field regexes on {len(mismatches)} inputs, e.g.:')
+        for m in mismatches[:5]:
+            print(f'  {m[:200]}')
+        return 1
+    print(f'same fields on {len(documents)} documents and {fuzz} random snippets')
+
+    print(f'\n{"document":>10} {"chars":>9} {"per-field ms":>13} {"single-pass ms":>15} {"speedup":>8}')
+    for name, text in documents.items():
+        legacy_ms = _best_ms(legacy_extract_fields, text, repeats)
+        single_ms = _best_ms(extractor.extract, text, repeats)
+        print(f'{name:>10} {len(text):>9} {legacy_ms:>13.3f} {single_ms:>15.3f} {legacy_ms / single_ms:>7.2f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark single-pass vs per-field regex extraction')
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=20, help='Runs per document (best is reported)')
+    parser.add_argument('--fuzz', type=int, default=20000, help='Random snippets checked for equal output')
+    args = parser.parse_args()
+    sys.exit(run_benchmark(args.pages, args.repeats, args.fuzz))
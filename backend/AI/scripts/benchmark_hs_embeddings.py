@@ -0,0 +1,66 @@
+"""
+Benchmark multi-process chunked encoding of HS texts against the single-process build.
+
+Encodes a sample of hs_meta.parquet once with a single `model.encode` call and
+then with `encode_chunked` for each worker count. It checks that the vectors
+match and prints the wall-clock time and speedup per worker count. Use one
+worker per physical core to measure scaling on the build box.
+
+Usage:
+    python benchmark_hs_embeddings.py --rows 4000 --workers 1,2,4,8
+"""
+
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from build_hs_embeddings import MODELS_DIR, DEFAULT_MODEL_NAME, encode_texts, encode_chunked, text_hashes
+
+
+def run_benchmark(n_rows, worker_counts, chunk_size, model_name=DEFAULT_MODEL_NAME):
+    texts = pd.read_parquet(os.path.join(MODELS_DIR, 'hs_meta.parquet'))['text'].astype(str).tolist()[:n_rows]
+    keys = list(text_hashes(texts))
+    print(f'{len(texts):,} texts, chunk size {chunk_size}, {os.cpu_count()} CPU cores visible')
+
+    # Warm imports and the file cache so the first timing is not penalized; model
+    # load is still included everywhere, as a real build pays it once per worker
+    encode_texts(texts[:1], model_name)
+    start = time.perf_counter()
+    reference = encode_texts(texts, model_name)
+    base_s = time.perf_counter() - start
+    print(f'   single process: {base_s:.2f}s')
+
+    rows = []
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as work_dir:
+            start = time.perf_counter()
+            vectors = encode_chunked(texts, keys, model_name, workers=workers, chunk_size=chunk_size, work_dir=work_dir)
+            elapsed = time.perf_counter() - start
+        max_diff = float(np.abs(vectors - reference).max())
+        assert max_diff < 1e-4, f'{workers} workers: vectors differ by {max_diff}'
+        rows.append((workers, elapsed, base_s / elapsed, max_diff))
+
+    print(f'\n{"workers":>8} {"seconds":>9} {"speedup":>8} {"max |diff|":>11}')
+    for workers, elapsed, speedup, max_diff in rows:
+        print(f'{workers:>8} {elapsed:>9.2f} {speedup:>7.2f}x {max_diff:>11.1e}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark parallel HS embedding encoding')
+    parser.add_argument('--rows', type=int, default=4000, help='Texts taken from hs_meta.parquet')
+    parser.add_argument('--workers', default=None, help='Comma-separated worker counts (default 1,2,4,... up to the core count)')
+    parser.add_argument('--chunk-size', type=int, default=512)
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(',')]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= (os.cpu_count() or 1):
+            counts.append(counts[-1] * 2)
+
+    run_benchmark(args.rows, counts, args.chunk_size)
@@ -0,0 +1,208 @@
+"""
+Benchmark PDF text extraction in the document validator (ocr.py).
+
+Generates multi-page sample shipping documents and times, per page count:
+
+- pdfplumber: every page through pdfplumber (the previous extractor), if installed;
+- text layer: pypdfium2 text layer, every page;
+- text layer + early stop: stop once the validator's fields are all found;
+- scanned xN: the same document as image-only pages, OCR'd with N workers
+  (needs pytesseract and the tesseract binary; reported as unavailable otherwise).
+
+Text modes must return the same text as the full text-layer run for the pages
+they read; the check is printed alongside the timings. Sample PDFs are written
+with a tiny built-in writer, so no PDF library is needed to generate them.
+
+Usage:
+    python benchmark_pdf_extraction.py --pages 10,40,120 --workers 1,2,4 --scanned-pages 4
+"""
+
+import os
+import sys
+import time
+import zlib
+import tempfile
+
+SERVICES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'services'))
+sys.path.insert(0, os.path.join(SERVICES_DIR, 'document_validator'))
+sys.path.append(SERVICES_DIR)
+
+import ocr  # noqa: E402
+
+HEADER_LINES = [
+    'COMMERCIAL INVOICE / PACKING LIST',
+    'HS Code: 847130',
+    'Product Description: Portable laptop computers, 14 inch, with charger',
+    'Quantity: 250',
+    'Gross Weight: 1250.5 kg',
+    'Package Type: Cartons on pallets',
+    'Country of Origin: China',
+    'Destination Country: Germany',
+    'Mode of Transport: Sea freight',
+]
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _scan(lines, dpi=150):
+    """Grayscale raster of `lines` as a scanner would produce it (requires Pillow)."""
+    from PIL import Image, ImageDraw, ImageFont
+    scale = dpi / 72
+    image = Image.new('L', (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=int(9 * scale))
+    for n, line in enumerate(lines):
+        draw.text((40 * scale, (42 + 11 * n) * scale), line, fill=0, font=font)
+    return image
+
+
+def write_pdf(path, pages, scanned=False):
+    """
+    Write a PDF with one page per entry of `pages` (lists of lines): Helvetica
+    text, or with `scanned` an image of the text and no text layer.
+    """
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: '<< /Type /Catalog /Pages 2 0 R >>',
+        2: f'<< /Type /Pages /Kids [{" ".join(f"{p} 0 R" for p in page_ids)}] /Count {len(pages)} >>',
+        3: '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    }
+    streams = {}
+    next_id = page_ids[-1] + 2 if page_ids else 4
+    for page_id, lines in zip(page_ids, pages):
+        resources = '/Font << /F1 3 0 R >>'
+        if scanned:
+            image = _scan(lines)
+            objects[next_id] = (f'<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} '
+                                '/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode')
+            streams[next_id] = zlib.compress(image.tobytes())
+            resources = f'/XObject << /Im1 {next_id} 0 R >>'
+            content = f'q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q'
+            next_id += 1
+        else:
+            content = 'BT /F1 9 Tf 11 TL 40 800 Td ' + ' '.join(f'({_pdf_escape(l)}) Tj T*' for l in lines) + ' ET'
+        objects[page_id] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                            f'/Resources << {resources} >> /Contents {page_id + 1} 0 R >>')
+        objects[page_id + 1] = '<<'
+        streams[page_id + 1] = content.encode('latin-1')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f'{obj_id} 0 obj\n'.encode()
+        if obj_id in streams:
+            data = streams[obj_id]
+            out += f'{objects[obj_id]} /Length {len(data)} >>\nstream\n'.encode('latin-1') + data + b'\nendstream'
+        else:
+            out += objects[obj_id].encode('latin-1')
+        out += b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offsets[obj_id]:010d} 00000 n \n' for obj_id in sorted(objects)).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def sample_pages(n_pages, lines_per_page=65):
+    """Invoice header on page 1, then item lines (the typical layout of a long packing list)."""
+    pages = []
+    for page in range(n_pages):
+        lines = list(HEADER_LINES) if page == 0 else []
+        for i in range(len(lines), lines_per_page):
+            item = page * lines_per_page + i
+            lines.append(f'Item {item:05d}  carton {item % 97:02d}  laptop computer serial SN{item * 7919 % 10**8:08d}')
+        pages.append(lines)
+    return pages
+
+
+def _fields_complete():
+    from validator import DocumentValidator
+    validator = DocumentValidator.__new__(DocumentValidator)  # field regexes only, no embedding model
+    return validator.fields_complete
+
+
+def _pdfplumber_text(path):
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return ocr._normalize_text('\n'.join(page.extract_text() or '' for page in pdf.pages))
+
+
+def _ocr_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return None
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def _time(fn, repeats):
+    best, result = None, None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(page_counts, worker_counts, scanned_pages, repeats=3):
+    is_complete = _fields_complete()
+    print(f'cpu cores: {os.cpu_count()}, OCR dpi: {ocr.OCR_DPI}')
+    print(f'\n{"pages":>6} {"mode":>24} {"seconds":>9} {"ms/page":>8} {"chars":>8} {"same text":>10}')
+    row = lambda n, mode, seconds, chars, same: print(
+        f'{n:>6} {mode:>24} {seconds:>9.4f} {1000 * seconds / n:>8.2f} {chars:>8} {same:>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in page_counts:
+            path = os.path.join(tmp, f'sample_{n_pages}.pdf')
+            write_pdf(path, sample_pages(n_pages))
+
+            seconds, full = _time(lambda: ocr.extract_document(path), repeats)
+            full_text = full['text']
+            try:
+                plumber_s, text = _time(lambda: _pdfplumber_text(path), 1)
+                row(n_pages, 'pdfplumber', plumber_s, len(text), str(text == full_text))
+            except ImportError:
+                print(f'{n_pages:>6} {"pdfplumber":>24}  (not installed)')
+            row(n_pages, 'text layer', seconds, len(full_text), 'True')
+            seconds, result = _time(lambda: ocr.extract_document(path, is_complete), repeats)
+            row(n_pages, 'text layer + early stop', seconds, len(result['text']),
+                str(full_text.startswith(result['text'])))
+
+        if not scanned_pages:
+            return
+        unavailable = _ocr_available()
+        if unavailable:
+            print(f'\nscanned pages: OCR unavailable ({unavailable})')
+            return
+        path = os.path.join(tmp, 'scanned.pdf')
+        write_pdf(path, sample_pages(scanned_pages), scanned=True)
+        ocr.PARALLEL_MIN_PAGES = 2
+        for workers in worker_counts:
+            ocr.shutdown_pdf_pool()
+            ocr.PDF_WORKERS = workers
+            ocr.prestart_pdf_pool()
+            seconds, result = _time(lambda: ocr.extract_document(path), 1)
+            ocr_s = sum(page['seconds'] for page in result['pages'])
+            row(scanned_pages, f'scanned x{workers}', seconds, len(result['text']),
+                f'{ocr_s:.2f}s ocr')
+        ocr.shutdown_pdf_pool()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark text-layer and OCR PDF extraction')
+    parser.add_argument('--pages', default='10,40,120', help='Comma-separated page counts (text PDFs)')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated OCR worker counts')
+    parser.add_argument('--scanned-pages', type=int, default=4, help='Pages of the scanned PDF (0 to skip)')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per text mode (best is reported)')
+    args = parser.parse_args()
+    run_benchmark([int(p) for p in args.pages.split(',')],
+                  [int(w) for w in args.workers.split(',')],
+                  args.scanned_pages, args.repeats)
@@ -0,0 +1,134 @@
+"""
+Benchmark cold start of the AI services.
+
+For each service this reports:
+
+- module import time of `app`, parsed from `python -X importtime`, with the
+  heaviest modules it pulls in;
+- time from launching uvicorn until `/health` answers, i.e. until the port
+  accepts requests;
+- time until `/ready` answers 200, i.e. until every model has been warmed up
+  in the background.
+
+Run it from the directory the services are normally started from (the
+embedding model name is resolved relative to it).
+
+Usage:
+    python benchmark_startup.py --services hs_service,document_validator,document_recommender
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import subprocess
+import urllib.error
+import urllib.request
+
+SERVICES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'services'))
+SERVICES = ('hs_service', 'document_validator', 'document_recommender')
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+def import_profile(service, top=8):
+    """(app import seconds, [(module, cumulative seconds)] of its heaviest imports)."""
+    app_dir = os.path.join(SERVICES_DIR, service)
+    code = f'import sys; sys.path.insert(0, {app_dir!r}); import app'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=os.getcwd(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'{service}: importing app failed:\n{proc.stderr[-2000:]}')
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((len(match.group(3)), match.group(4), int(match.group(2)) / 1e6))
+    # The app entry comes after everything it imported (deeper indentation)
+    app_at = max(i for i, (_, name, _) in enumerate(entries) if name == 'app')
+    app_depth, _, total = entries[app_at]
+    first = app_at
+    while first > 0 and entries[first - 1][0] > app_depth:
+        first -= 1
+    # Direct imports and their children only (a package already counts its submodules)
+    heaviest = sorted(((name, cumulative) for depth, name, cumulative in entries[first:app_at]
+                       if depth <= app_depth + 4), key=lambda e: -e[1])
+    seen, modules = set(), []
+    for name, cumulative in heaviest:
+        root = name.split('.')[0]
+        if root not in seen:
+            seen.add(root)
+            modules.append((name, cumulative))
+    return total, modules[:top]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as ex:
+        return ex.code
+    except OSError:
+        return None
+
+
+def time_to_health_and_ready(service, timeout=180.0, poll=0.02):
+    """Seconds from launch until /health answers and until /ready returns 200 (None if it never does)."""
+    port = _free_port()
+    cmd = [sys.executable, '-m', 'uvicorn', '--app-dir', os.path.join(SERVICES_DIR, service),
+           '--port', str(port), '--log-level', 'warning', 'app:app']
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    health_s = ready_s = None
+    try:
+        while time.perf_counter() - started < timeout and proc.poll() is None:
+            if health_s is None:
+                if _status(f'http://127.0.0.1:{port}/health') == 200:
+                    health_s = time.perf_counter() - started
+            else:
+                status = _status(f'http://127.0.0.1:{port}/ready')
+                if status == 200:
+                    ready_s = time.perf_counter() - started
+                    break
+                if status == 404:
+                    break  # no readiness endpoint
+            time.sleep(poll)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return health_s, ready_s
+
+
+def run_benchmark(services, repeats=1):
+    rows = []
+    for service in services:
+        import_s, modules = import_profile(service)
+        runs = [time_to_health_and_ready(service) for _ in range(repeats)]
+        health = [h for h, _ in runs if h is not None]
+        ready = [r for _, r in runs if r is not None]
+        rows.append((service, import_s, min(health) if health else None, min(ready) if ready else None))
+        print(f'\n{service}: import app {import_s:.2f}s; heaviest imports:')
+        for name, cumulative in modules:
+            print(f'  {cumulative:7.3f}s  {name}')
+
+    fmt = lambda v: '–' if v is None else f'{v:.2f}'
+    print(f'\n{"service":>22} {"import s":>9} {"/health s":>10} {"/ready s":>9}')
+    for service, import_s, health_s, ready_s in rows:
+        print(f'{service:>22} {import_s:>9.2f} {fmt(health_s):>10} {fmt(ready_s):>9}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark import time and time to /health and /ready')
+    parser.add_argument('--services', default=','.join(SERVICES))
+    parser.add_argument('--repeats', type=int, default=1, help='Launches per service (best is reported)')
+    args = parser.parse_args()
+    run_benchmark([s.strip() for s in args.services.split(',') if s.strip()], args.repeats)
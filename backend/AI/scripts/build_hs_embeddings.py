@@ -1,33 +1,488 @@
 import os
+import json
+import math
+import time
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 import faiss
 
 BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
-os.makedirs(MODELS_DIR, exist_ok=True)
 
-meta_parquet = os.path.join(MODELS_DIR, 'hs_meta.parquet')
-if not os.path.exists(meta_parquet):
-    raise FileNotFoundError(f"Missing {meta_parquet}. Run prepare_hs_data.py first.")
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'ivfpq')
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
 
-hs = pd.read_parquet(meta_parquet)
-texts = hs['text'].astype(str).tolist()
+MANIFEST_FILE = 'hs_build_manifest.json'
+# Files the HS service loads; their sha256 goes into the manifest, and the
+# service only swaps in a set that matches it
+SERVED_FILES = ('hs_index.faiss', 'hs_index.json', 'hs_meta.arrow', 'embeddings.npy')
+# Row-aligned text hashes of embeddings.npy, used to reuse vectors on the next build
+HASHES_FILE = 'embeddings_hashes.npy'
+# Encoded chunks of an unfinished build, reused when the build is rerun
+CHUNKS_DIR = '.embedding_chunks'
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
-embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+# Search-time settings tried when tuning for a target recall
+NPROBE_SWEEP = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256, 512)
 
-# Normalize embeddings for cosine via inner product
-faiss.normalize_L2(embeddings)
 
-d = embeddings.shape[1]
-index = faiss.IndexFlatIP(d)
-index.add(embeddings)
+def encode_texts(texts, model_name=DEFAULT_MODEL_NAME):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    return model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
 
-faiss.write_index(index, os.path.join(MODELS_DIR, 'hs_index.faiss'))
-np.save(os.path.join(MODELS_DIR, 'embeddings.npy'), embeddings)
-hs.to_csv(os.path.join(MODELS_DIR, 'hs_meta.csv'), index=False)
 
-print('Embeddings shape:', embeddings.shape)
-print('Saved FAISS index and embeddings.')
+_chunk_model = None
+
+
+def _init_chunk_encoder(model_name, torch_threads=None):
+    """Load the model once per encoding process (pool initializer)."""
+    global _chunk_model
+    if torch_threads:
+        import torch
+        # Workers split the cores instead of each spawning one thread per core
+        torch.set_num_threads(torch_threads)
+    from sentence_transformers import SentenceTransformer
+    _chunk_model = SentenceTransformer(model_name)
+
+
+def _encode_chunk(chunk_id, texts):
+    return chunk_id, _chunk_model.encode(texts, convert_to_numpy=True)
+
+
+def encode_chunked(texts, keys, model_name=DEFAULT_MODEL_NAME, workers=1, chunk_size=1024, work_dir=None):
+    """
+    Encode `texts` in chunks of `chunk_size`, spread over `workers` processes.
+
+    Each chunk is saved under `work_dir` as soon as it finishes. Rerunning
+    with the same inputs after a crash loads those chunks and encodes only the
+    missing ones. Chunks are matched by a key over the model, chunk size and
+    `keys` (one stable key per text, e.g. its hash). The chunk files are
+    removed once every chunk is done.
+    """
+    run_key = hashlib.blake2b(f'{model_name}|{chunk_size}|{"".join(keys)}'.encode('utf-8'), digest_size=8).hexdigest()
+    run_dir = os.path.join(work_dir, run_key)
+    os.makedirs(run_dir, exist_ok=True)
+
+    n_chunks = math.ceil(len(texts) / chunk_size)
+    chunks = [None] * n_chunks
+    for chunk_id in range(n_chunks):
+        path = os.path.join(run_dir, f'chunk_{chunk_id:06d}.npy')
+        if os.path.exists(path):
+            chunks[chunk_id] = np.load(path)
+    todo = [chunk_id for chunk_id in range(n_chunks) if chunks[chunk_id] is None]
+    if len(todo) < n_chunks:
+        print(f'Resuming: {n_chunks - len(todo)}/{n_chunks} chunks already encoded in {run_dir}')
+
+    def save(chunk_id, vectors):
+        path = os.path.join(run_dir, f'chunk_{chunk_id:06d}.npy')
+        write_atomic(path, lambda p: np.save(p, vectors))
+        chunks[chunk_id] = vectors
+        print(f'  chunk {chunk_id + 1}/{n_chunks} done ({n_chunks - sum(c is None for c in chunks)} complete)')
+
+    def chunk_texts(chunk_id):
+        return texts[chunk_id * chunk_size:(chunk_id + 1) * chunk_size]
+
+    if todo and workers <= 1:
+        _init_chunk_encoder(model_name)
+        for chunk_id in todo:
+            save(*_encode_chunk(chunk_id, chunk_texts(chunk_id)))
+    elif todo:
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        # spawn: each worker starts clean and loads its own copy of the model
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_chunk_encoder, initargs=(model_name, torch_threads)) as pool:
+            futures = [pool.submit(_encode_chunk, chunk_id, chunk_texts(chunk_id)) for chunk_id in todo]
+            for future in as_completed(futures):
+                save(*future.result())
+
+    embeddings = np.concatenate(chunks)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return embeddings
+
+
+def text_hashes(texts):
+    """128-bit BLAKE2b hex digest of each text (the embedding input)."""
+    return np.array([hashlib.blake2b(t.encode('utf-8'), digest_size=16).hexdigest() for t in texts], dtype='<U32')
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_previous_build(models_dir, model_name):
+    """
+    Previous (manifest, embeddings, hashes), or None when there is nothing
+    reusable: files missing, rows misaligned, or a different embedding model.
+    """
+    manifest_path = os.path.join(models_dir, MANIFEST_FILE)
+    emb_path = os.path.join(models_dir, 'embeddings.npy')
+    hashes_path = os.path.join(models_dir, HASHES_FILE)
+    if not all(os.path.exists(p) for p in (manifest_path, emb_path, hashes_path)):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('model', {}).get('name') != model_name:
+        print('Embedding model changed; re-encoding everything.')
+        return None
+    embeddings = np.load(emb_path, mmap_mode='r')
+    hashes = np.load(hashes_path)
+    if embeddings.ndim != 2 or embeddings.shape[0] != hashes.shape[0]:
+        print('Previous embeddings and hashes are misaligned; re-encoding everything.')
+        return None
+    return manifest, embeddings, hashes
+
+
+def incremental_embeddings(texts, hashes, previous=None, model_name=DEFAULT_MODEL_NAME,
+                           workers=1, chunk_size=1024, work_dir=None):
+    """
+    L2-normalized float32 embeddings for `texts`.
+
+    Rows whose hash appears in `previous` (embeddings, hashes) reuse the stored
+    vector; only new or changed texts are encoded, each distinct text once.
+    With a `work_dir` they are encoded by `encode_chunked` (parallel, resumable).
+    Returns (embeddings, stats).
+    """
+    reuse = {}
+    if previous is not None:
+        prev_embeddings, prev_hashes = previous
+        reuse = {h: i for i, h in enumerate(prev_hashes)}
+
+    # Distinct hashes that need encoding, with one representative text each
+    to_encode = {}
+    for text, h in zip(texts, hashes):
+        if h not in reuse and h not in to_encode:
+            to_encode[h] = text
+
+    encode_seconds = 0.0
+    encoded = {}
+    if to_encode:
+        started = time.perf_counter()
+        if work_dir:
+            vectors = encode_chunked(list(to_encode.values()), list(to_encode), model_name,
+                                     workers=workers, chunk_size=chunk_size, work_dir=work_dir)
+        else:
+            vectors = encode_texts(list(to_encode.values()), model_name)
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        faiss.normalize_L2(vectors)
+        encode_seconds = time.perf_counter() - started
+        encoded = dict(zip(to_encode, vectors))
+
+    dim = next(iter(encoded.values())).shape[0] if encoded else previous[0].shape[1]
+    embeddings = np.empty((len(texts), dim), dtype='float32')
+    reused_rows = 0
+    for row, h in enumerate(hashes):
+        if h in encoded:
+            embeddings[row] = encoded[h]
+        else:
+            embeddings[row] = previous[0][reuse[h]]
+            reused_rows += 1
+
+    stats = {
+        'rows': len(texts),
+        'reused_rows': reused_rows,
+        'encoded_rows': len(texts) - reused_rows,
+        'encoded_texts': len(to_encode),
+        'removed_texts': len(set(reuse) - set(hashes.tolist())) if reuse else 0,
+        'encode_seconds': round(encode_seconds, 3),
+        'workers': workers,
+    }
+    return embeddings, stats
+
+
+def default_nlist(n):
+    """~4*sqrt(n) inverted lists, but keep >= 39 training points per list."""
+    return int(max(1, min(4 * np.sqrt(n), n // 39)))
+
+
+def select_training_sample(embeddings, train_size, seed=42):
+    """Uniform sample without replacement of the rows used to train the coarse quantizer / PQ codebooks."""
+    n = embeddings.shape[0]
+    if train_size >= n:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(n, size=train_size, replace=False))
+    return np.ascontiguousarray(embeddings[rows])
+
+
+def held_out_queries(embeddings, n_queries, seed=42):
+    """
+    (base, queries): `n_queries` random rows (at most half) as recall queries
+    and the remaining rows as the vectors searched. A query that is itself in
+    the index finds its exact self-match, which inflates recall, most of all
+    for HNSW / IVF.
+    """
+    n = embeddings.shape[0]
+    rng = np.random.default_rng(seed)
+    held = np.zeros(n, dtype=bool)
+    held[rng.choice(n, size=min(n_queries, n // 2), replace=False)] = True
+    return np.ascontiguousarray(embeddings[~held]), np.ascontiguousarray(embeddings[held])
+
+
+def build_index(embeddings, index_type='flat', nlist=None, hnsw_m=32, ef_construction=200,
+                pq_m=48, pq_nbits=8, train_size=None, seed=42, trained_index=None):
+    """
+    Build an inner-product FAISS index over L2-normalized embeddings.
+
+    For ivf/ivfpq, `trained_index` (e.g. the previous build's index) is emptied
+    and refilled instead of training a new coarse quantizer / PQ codebooks.
+
+    Returns (index, build_info) where build_info records the parameters used.
+    """
+    n, d = embeddings.shape
+    info = {'index_type': index_type, 'dim': int(d), 'ntotal': int(n)}
+
+    if trained_index is not None and index_type in ('ivf', 'ivfpq'):
+        index = trained_index
+        index.reset()
+        info.update({'nlist': int(faiss.extract_index_ivf(index).nlist), 'retrained': False})
+        if index_type == 'ivfpq':
+            info.update({'pq_m': pq_m, 'pq_nbits': pq_nbits})
+    elif index_type == 'flat':
+        index = faiss.IndexFlatIP(d)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        info.update({'hnsw_m': hnsw_m, 'ef_construction': ef_construction})
+    elif index_type in ('ivf', 'ivfpq'):
+        nlist = nlist or default_nlist(n)
+        quantizer = faiss.IndexFlatIP(d)
+        if index_type == 'ivf':
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            if d % pq_m != 0:
+                raise ValueError(f'pq_m={pq_m} must divide the embedding dimension {d}')
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+            info.update({'pq_m': pq_m, 'pq_nbits': pq_nbits})
+        # Default sample: plenty of points per list, and enough for 2**nbits PQ centroids
+        train_size = min(n, train_size or max(64 * nlist, 2 ** pq_nbits * 40))
+        sample = select_training_sample(embeddings, train_size, seed)
+        started = time.perf_counter()
+        index.train(sample)
+        info.update({'nlist': nlist, 'train_size': int(sample.shape[0]), 'retrained': True,
+                     'train_seconds': round(time.perf_counter() - started, 3)})
+    else:
+        raise ValueError(f'Unknown index type {index_type!r}; expected one of {INDEX_TYPES}')
+
+    started = time.perf_counter()
+    index.add(embeddings)
+    info['add_seconds'] = round(time.perf_counter() - started, 3)
+    return index, info
+
+
+def set_search_params(index, params):
+    """Apply search-time parameters such as {'nprobe': 16} or {'efSearch': 64}."""
+    space = faiss.ParameterSpace()
+    for name, value in (params or {}).items():
+        space.set_index_parameter(index, name, value)
+
+
+def recall_at_k(index, flat_index, queries, ks=(1, 5, 10)):
+    """
+    Recall of `index` against exact search: |approx top-k ∩ exact top-k| / k,
+    averaged over queries. Also returns mean per-query latency in ms.
+    """
+    k_max = max(ks)
+    _, exact = flat_index.search(queries, k_max)
+    started = time.perf_counter()
+    _, approx = index.search(queries, k_max)
+    latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    report = {}
+    for k in ks:
+        hits = sum(len(set(a[:k]) & set(e[:k])) for a, e in zip(approx, exact))
+        report[f'recall@{k}'] = round(hits / (k * len(queries)), 4)
+    report['latency_ms'] = round(latency_ms, 4)
+    return report
+
+
+def tune_search_params(index, index_type, flat_index, queries, target_recall=0.95, k=10):
+    """
+    Sweep nprobe / efSearch and return the cheapest setting that reaches
+    `target_recall` recall@k (or the most accurate one tried), plus the sweep.
+    """
+    if index_type in ('ivf', 'ivfpq'):
+        name = 'nprobe'
+        values = [v for v in NPROBE_SWEEP if v <= faiss.extract_index_ivf(index).nlist]
+    elif index_type == 'hnsw':
+        name, values = 'efSearch', list(EF_SEARCH_SWEEP)
+    else:
+        return {}, []
+
+    sweep = []
+    chosen = None
+    for value in values:
+        set_search_params(index, {name: value})
+        report = recall_at_k(index, flat_index, queries, ks=(1, 5, k))
+        sweep.append({name: value, **report})
+        if chosen is None and report[f'recall@{k}'] >= target_recall:
+            chosen = value
+    if chosen is None:
+        chosen = values[-1]
+    set_search_params(index, {name: chosen})
+    return {name: chosen}, sweep
+
+
+def write_atomic(path, write):
+    """
+    Call `write(tmp_path)` and rename the result over `path`, so readers (and
+    services that memory-map the old file) never see a half-written file.
+    """
+    root, ext = os.path.splitext(path)
+    tmp_path = f'{root}.tmp{ext}'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(obj, path):
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
+
+def write_meta_arrow(hs, path):
+    """hscode/description only, as an Arrow IPC file the HS service memory-maps."""
+    import pyarrow as pa
+    table = pa.table({
+        'hscode': pa.array(hs['hscode'].astype(str).tolist(), type=pa.string()),
+        'description': pa.array(hs['description'].astype(str).tolist(), type=pa.string()),
+    })
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build HS code embeddings and FAISS index')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='flat')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF lists (default ~4*sqrt(n))')
+    parser.add_argument('--hnsw-m', type=int, default=32)
+    parser.add_argument('--ef-construction', type=int, default=200)
+    parser.add_argument('--pq-m', type=int, default=48, help='PQ sub-quantizers (must divide dim)')
+    parser.add_argument('--pq-nbits', type=int, default=8)
+    parser.add_argument('--train-size', type=int, default=None, help='Rows sampled to train IVF/PQ')
+    parser.add_argument('--nprobe', type=int, default=None, help='Fixed nprobe (skips tuning)')
+    parser.add_argument('--ef-search', type=int, default=None, help='Fixed efSearch (skips tuning)')
+    parser.add_argument('--target-recall', type=float, default=0.95, help='recall@10 vs flat when tuning')
+    parser.add_argument('--eval-queries', type=int, default=1000,
+                        help='Rows held out of a copy of the index as recall queries')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME, help='SentenceTransformer model name')
+    parser.add_argument('--full', action='store_true', help='Re-encode every row instead of reusing unchanged ones')
+    parser.add_argument('--retrain-threshold', type=float, default=0.1,
+                        help='Retrain IVF/PQ when more than this fraction of rows changed')
+    parser.add_argument('--workers', type=int, default=1, help='Encoding processes (e.g. one per core)')
+    parser.add_argument('--chunk-size', type=int, default=1024,
+                        help='Texts per saved chunk; an interrupted build resumes from finished chunks')
+    args = parser.parse_args()
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+
+    meta_parquet = os.path.join(MODELS_DIR, 'hs_meta.parquet')
+    if not os.path.exists(meta_parquet):
+        raise FileNotFoundError(f"Missing {meta_parquet}. Run prepare_hs_data.py first.")
+
+    started = time.perf_counter()
+    hs = pd.read_parquet(meta_parquet)
+    texts = hs['text'].astype(str).tolist()
+    hashes = text_hashes(texts)
+
+    # Vectors of unchanged texts come from the previous build
+    previous = None if args.full else load_previous_build(MODELS_DIR, args.model)
+    embeddings, embed_stats = incremental_embeddings(
+        texts, hashes, previous[1:] if previous else None, model_name=args.model,
+        workers=args.workers, chunk_size=args.chunk_size, work_dir=os.path.join(MODELS_DIR, CHUNKS_DIR))
+    print(f"Embeddings: {embed_stats['reused_rows']} rows reused, {embed_stats['encoded_rows']} rows "
+          f"({embed_stats['encoded_texts']} distinct texts) encoded in {embed_stats['encode_seconds']}s")
+
+    index_args = {
+        'index_type': args.index_type, 'nlist': args.nlist, 'hnsw_m': args.hnsw_m,
+        'ef_construction': args.ef_construction, 'pq_m': args.pq_m, 'pq_nbits': args.pq_nbits,
+        'train_size': args.train_size, 'seed': args.seed,
+    }
+    # A small update keeps the previous IVF/PQ training; only the vectors are re-added
+    trained_index = None
+    index_path = os.path.join(MODELS_DIR, 'hs_index.faiss')
+    changed_fraction = embed_stats['encoded_rows'] / max(1, len(texts))
+    if (previous and args.index_type in ('ivf', 'ivfpq') and os.path.exists(index_path)
+            and previous[0].get('index', {}).get('args') == index_args
+            and changed_fraction <= args.retrain_threshold):
+        trained_index = faiss.read_index(index_path)
+
+    build_args = dict(nlist=args.nlist, hnsw_m=args.hnsw_m, ef_construction=args.ef_construction,
+                      pq_m=args.pq_m, pq_nbits=args.pq_nbits, train_size=args.train_size, seed=args.seed)
+    index_started = time.perf_counter()
+    index, build_info = build_index(embeddings, args.index_type, trained_index=trained_index, **build_args)
+    index_seconds = time.perf_counter() - index_started
+
+    config = {'build': build_info, 'search_params': {}, 'recall': None, 'sweep': []}
+    if args.index_type != 'flat':
+        # Recall is measured with held-out rows as queries, on an index of the same
+        # kind over the other rows (IVF/PQ reuse the served index's training)
+        base, queries = held_out_queries(embeddings, args.eval_queries, args.seed + 1)
+        flat = faiss.IndexFlatIP(embeddings.shape[1])
+        flat.add(base)
+        tune_index, _ = build_index(
+            base, args.index_type, **build_args,
+            trained_index=faiss.clone_index(index) if args.index_type in ('ivf', 'ivfpq') else None)
+
+        fixed = {}
+        if args.index_type in ('ivf', 'ivfpq') and args.nprobe:
+            fixed = {'nprobe': args.nprobe}
+        elif args.index_type == 'hnsw' and args.ef_search:
+            fixed = {'efSearch': args.ef_search}
+
+        if fixed:
+            set_search_params(tune_index, fixed)
+            config['search_params'] = fixed
+        else:
+            config['search_params'], config['sweep'] = tune_search_params(
+                tune_index, args.index_type, flat, queries, target_recall=args.target_recall)
+        set_search_params(index, config['search_params'])
+        config['recall'] = recall_at_k(tune_index, flat, queries)
+        config['recall']['flat_latency_ms'] = recall_at_k(flat, flat, queries)['latency_ms']
+        config['recall']['held_out_queries'] = int(queries.shape[0])
+
+        print('Recall vs flat index:')
+        for row in config['sweep']:
+            print('  ', row)
+        print('Chosen search params:', config['search_params'], config['recall'])
+
+    write_atomic(index_path, lambda p: faiss.write_index(index, p))
+    write_atomic(os.path.join(MODELS_DIR, 'embeddings.npy'), lambda p: np.save(p, embeddings))
+    write_atomic(os.path.join(MODELS_DIR, HASHES_FILE), lambda p: np.save(p, hashes))
+    write_atomic(os.path.join(MODELS_DIR, 'hs_meta.csv'), lambda p: hs.to_csv(p, index=False))
+    write_atomic(os.path.join(MODELS_DIR, 'hs_meta.arrow'), lambda p: write_meta_arrow(hs, p))
+    # The service reads the index type and search params from here on reload
+    write_atomic(os.path.join(MODELS_DIR, 'hs_index.json'), lambda p: write_json(config, p))
+
+    # Written last: a manifest only exists for a complete build
+    manifest = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'source': {'file': 'hs_meta.parquet', 'sha256': file_sha256(meta_parquet), 'rows': len(hs)},
+        'model': {'name': args.model, 'dim': int(embeddings.shape[1]), 'normalized': True},
+        'text_hash': 'blake2b-128 of the text column',
+        'embeddings': {'file': 'embeddings.npy', 'hashes_file': HASHES_FILE, 'full_rebuild': previous is None,
+                       **embed_stats},
+        'index': {'file': 'hs_index.faiss', 'args': index_args, 'build_seconds': round(index_seconds, 3)},
+        'files': {name: file_sha256(os.path.join(MODELS_DIR, name)) for name in SERVED_FILES},
+        'total_seconds': round(time.perf_counter() - started, 3),
+    }
+    if args.index_type in ('ivf', 'ivfpq'):
+        # Only IVF/PQ have a trained quantizer that a small update can keep
+        manifest['index']['retrained'] = trained_index is None
+    write_atomic(os.path.join(MODELS_DIR, MANIFEST_FILE), lambda p: write_json(manifest, p))
+
+    print('Embeddings shape:', embeddings.shape)
+    print('Saved FAISS index and embeddings.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,374 @@
+"""
+Evaluate HS code search: retrieval quality, latency and memory per configuration.
+
+Takes a labelled query set (product text -> expected HS code, default
+datasets/hs_eval_queries.csv with columns name, category, hscode) and runs
+every combination of encoder backend, FAISS index type, search mode
+(flat / hierarchical) and lexical fusion (on / off). Rankings come from the
+HS service's search pipeline (services/hs_service/search.py, the same
+`search` /suggest-hs calls, including the code-prefix answer to numeric
+queries), so the numbers match what the service returns. HS_RRF_K,
+HS_FUSION_DEPTH and HS_HIER_CHAPTERS / HS_HIER_HEADINGS are honoured as in
+the service.
+
+Per configuration it reports:
+
+- recall@1/5/10 and MRR@10 at chapter (2-digit), heading (4-digit) and
+  subheading (6-digit) level: a hit at a level is a suggestion whose code
+  starts with the expected code's first 2/4/6 digits;
+- single-query latency (p50/p90/p99) and batched latency per batch and per
+  query, through the same encode + search path as the endpoints (query cache off);
+- index memory: serialized FAISS index or hierarchy arrays, BM25 postings.
+
+Results are written as JSON (--output). Pass an earlier file with --compare to
+print the changes between builds.
+
+Usage:
+    python evaluate_hs_search.py
+    python evaluate_hs_search.py --backends torch,onnx-int8 --index-types flat,hnsw --lexical on
+    python evaluate_hs_search.py --output eval_new.json --compare eval_old.json
+    python evaluate_hs_search.py --synthetic 1000   # proxy queries made from HS descriptions
+"""
+
 import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import platform
+import subprocess
+from datetime import datetime, timezone
+
 import numpy as np
-import pandas as pd
-from sentence_transformers import SentenceTransformer
 import faiss
 
-BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
+DATASETS_DIR = os.path.join(BASE_DIR, 'datasets')
+SERVICES_DIR = os.path.join(BASE_DIR, 'services')
+HS_SERVICE_DIR = os.path.join(SERVICES_DIR, 'hs_service')
+
+DEFAULT_QUERIES = os.path.join(DATASETS_DIR, 'hs_eval_queries.csv')
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, 'hs_search_eval.json')
+LEVELS = (('chapter', 2), ('heading', 4), ('subheading', 6))
+KS = (1, 5, 10)
+SEARCH_MODES = ('flat', 'hierarchical')
+
+for _path in (HS_SERVICE_DIR, SERVICES_DIR):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+import search as hs_search
+from build_hs_embeddings import (INDEX_TYPES, build_index, held_out_queries, recall_at_k, set_search_params,
+                                 tune_search_params)
+from common.embedding_registry import EMBEDDING_BACKENDS, get_embedding_model, process_memory
+from hierarchy import HsHierarchy
+from lexical import Bm25Index, HsCodePrefixIndex
+from meta_store import HsMetaStore
+
+
+def load_queries(path):
+    """[(query text, expected code)] from a CSV with name[, category][, description], hscode."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    labelled = []
+    for row in rows:
+        query = hs_search.build_query(row.get('name', ''), row.get('category', ''), row.get('description', ''))
+        labelled.append((query, row['hscode'].strip()))
+    return labelled
+
+
+def synthetic_queries(codes, descriptions, n, drop=0.4, seed=0):
+    """
+    Proxy queries: descriptions of random 6-digit codes with `drop` of their
+    words removed. Only the labelled set measures real product text.
+    """
+    rng = np.random.default_rng(seed)
+    leaves = [i for i, code in enumerate(codes) if len(code) == 6]
+    queries = []
+    for row in rng.choice(leaves, size=min(n, len(leaves)), replace=False):
+        words = descriptions[row].lower().replace(';', ' ').replace(',', ' ').split()
+        kept = [w for w in words if rng.random() >= drop] or words[:1]
+        queries.append((' '.join(kept), codes[row]))
+    return queries
+
+
+def rank_metrics(ranked_codes, expected):
+    """recall@k and MRR@10 per level for ranked code lists against expected codes."""
+    report = {}
+    for level, digits in LEVELS:
+        ranks = []
+        for codes, target in zip(ranked_codes, expected):
+            target = target[:digits]
+            ranks.append(next((i + 1 for i, code in enumerate(codes) if code[:digits] == target), None))
+        n = len(ranks)
+        report[level] = {
+            **{f'recall@{k}': round(sum(1 for r in ranks if r is not None and r <= k) / n, 4) for k in KS},
+            'mrr': round(sum(1 / r for r in ranks if r is not None and r <= max(KS)) / n, 4),
+        }
+    return report
+
+
+def _percentiles(values_ms):
+    values = np.asarray(values_ms)
+    return {
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p90': round(float(np.percentile(values, 90)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'mean': round(float(values.mean()), 3),
+    }
+
+
+def measure_latency(res, model, queries, n_single, batch_size, k=max(KS)):
+    """Latency of the service's search on `res` with `model`, without the query cache."""
+    pool = [q for q, _ in queries]
+    sample = [pool[i % len(pool)] for i in range(max(n_single, batch_size))]
+    hs_search.search(res, model, sample[:2], k)  # warm-up
+    single = []
+    for q in sample[:n_single]:
+        started = time.perf_counter()
+        hs_search.search(res, model, [q], k)
+        single.append((time.perf_counter() - started) * 1000)
+    batches = []
+    for start in range(0, len(sample) - batch_size + 1, batch_size):
+        started = time.perf_counter()
+        hs_search.search(res, model, sample[start:start + batch_size], k)
+        batches.append((time.perf_counter() - started) * 1000)
+    batch = _percentiles(batches)
+    return {
+        'single_ms': _percentiles(single),
+        'batch_ms': {**batch, 'batch_size': batch_size, 'per_query': round(batch['mean'] / batch_size, 3)},
+    }
+
+
+def _nbytes(*arrays):
+    return int(sum(np.asarray(a).nbytes for a in arrays))
+
+
+def build_indexes(embeddings, index_types, eval_queries=1000, target_recall=0.95, seed=42):
+    """{index type: (index, info)}, tuned like build_hs_embeddings.py does."""
+    flat = faiss.IndexFlatIP(embeddings.shape[1])
+    flat.add(embeddings)
+    # Tuning queries are held out of a copy of each index, so none finds itself
+    base, tune_on = held_out_queries(embeddings, eval_queries, seed + 1)
+    base_flat = faiss.IndexFlatIP(embeddings.shape[1])
+    base_flat.add(base)
+    indexes = {}
+    for index_type in index_types:
+        if index_type == 'flat':
+            indexes[index_type] = (flat, {'build': {'index_type': 'flat'}, 'search_params': {}})
+            continue
+        started = time.perf_counter()
+        index, build_info = build_index(embeddings, index_type, seed=seed)
+        tune_index, _ = build_index(base, index_type, seed=seed,
+                                    trained_index=faiss.clone_index(index) if index_type in ('ivf', 'ivfpq') else None)
+        params, _ = tune_search_params(tune_index, index_type, base_flat, tune_on, target_recall=target_recall)
+        set_search_params(index, params)
+        build_info['build_seconds'] = round(time.perf_counter() - started, 3)
+        indexes[index_type] = (index, {'build': build_info, 'search_params': params,
+                                       'recall_vs_flat': recall_at_k(tune_index, base_flat, tune_on)})
+        print(f'Built {index_type} index in {build_info["build_seconds"]:.1f}s, search params {params}')
+    return indexes
+
+
+def run_evaluation(queries, backends, index_types, search_modes, lexical_modes,
+                   latency_queries=200, batch_size=32):
+    meta = HsMetaStore.load(MODELS_DIR)
+    codes = meta.hscode.to_pylist()
+    descriptions = meta.description.to_pylist()
+    embeddings = np.load(os.path.join(MODELS_DIR, 'embeddings.npy'), mmap_mode='r')
+    dense = np.ascontiguousarray(embeddings, dtype='float32')
+    code_index = HsCodePrefixIndex(codes)
+
+    known = set(codes)
+    unknown = sorted({code for _, code in queries if code not in known})
+    if unknown:
+        print(f'WARNING: {len(unknown)} expected codes are not in the index: {", ".join(unknown[:10])}')
+
+    indexes = build_indexes(dense, index_types) if 'flat' in search_modes else {}
+    hierarchy = HsHierarchy.build(codes, embeddings) if 'hierarchical' in search_modes else None
+    lexical_for = {}
+
+    def lexical_index(mode):
+        if mode not in lexical_for:
+            rows = hierarchy.leaf_rows if mode == 'hierarchical' else None
+            lexical_for[mode] = Bm25Index.build(codes, descriptions, rows=rows)
+        return lexical_for[mode]
+
+    texts = [q for q, _ in queries]
+    expected = [code for _, code in queries]
+    results, skipped = [], []
+    for backend in backends:
+        try:
+            model = get_embedding_model(backend=backend)
+        except Exception as ex:
+            print(f'Skipping backend {backend}: {ex}')
+            skipped.append({'backend': backend, 'reason': str(ex)})
+            continue
+        started = time.perf_counter()
+        model.encode(texts, batch_size=hs_search.ENCODE_BATCH_SIZE, convert_to_numpy=True)
+        encode_ms = (time.perf_counter() - started) * 1000 / len(texts)
+
+        configs = [('flat', t) for t in index_types if 'flat' in search_modes]
+        if 'hierarchical' in search_modes:
+            configs.append(('hierarchical', None))
+        for mode, index_type in configs:
+            for lexical_on in lexical_modes:
+                if mode == 'flat':
+                    index, config = indexes[index_type]
+                    memory = {'index_bytes': int(faiss.serialize_index(index).nbytes)}
+                else:
+                    index, config = None, {}
+                    memory = {'index_bytes': _nbytes(hierarchy.chapter_centroids, hierarchy.heading_centroids,
+                                                     hierarchy.chapter_heading_offsets,
+                                                     hierarchy.heading_leaf_offsets, hierarchy.leaf_rows)}
+                lexical = lexical_index(mode) if lexical_on else None
+                memory['lexical_bytes'] = _nbytes(lexical.offsets, lexical.rows, lexical.weights) if lexical else 0
+                res = hs_search.SearchResources(
+                    index, meta, config, {}, (), hierarchy if mode == 'hierarchical' else None,
+                    lexical, code_index, embeddings)
+
+                suggestions = hs_search.search(res, model, texts, max(KS))
+                ranked = [[s['hscode'] for s in found] for found in suggestions]
+                latency = measure_latency(res, model, queries, latency_queries, batch_size)
+                memory.update(process_memory())
+                result = {
+                    'config': f'{backend}/{mode}/{index_type or "-"}/{"lexical" if lexical_on else "dense"}',
+                    'backend': backend,
+                    'search_mode': mode,
+                    'index_type': index_type,
+                    'lexical': lexical_on,
+                    'search_params': config.get('search_params', {}),
+                    'metrics': rank_metrics(ranked, expected),
+                    'latency': {'encode_per_query_ms': round(encode_ms, 3), **latency},
+                    'memory': memory,
+                }
+                if 'recall_vs_flat' in config:
+                    result['recall_vs_flat'] = config['recall_vs_flat']
+                results.append(result)
+                print(f'  {result["config"]:<38} subheading R@1 {result["metrics"]["subheading"]["recall@1"]:.3f} '
+                      f'MRR {result["metrics"]["subheading"]["mrr"]:.3f}  single p50 {latency["single_ms"]["p50"]:.2f} ms')
+    return results, skipped
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def print_table(results):
+    print(f'\n{"configuration":<38} {"ch R@1":>7} {"hd R@1":>7} {"sub R@1":>8} {"sub R@5":>8} {"sub R@10":>9} '
+          f'{"sub MRR":>8} {"p50 ms":>7} {"p99 ms":>7} {"batch/q ms":>10} {"index MB":>9}')
+    for r in results:
+        m, lat = r['metrics'], r['latency']
+        print(f'{r["config"]:<38} {m["chapter"]["recall@1"]:>7.3f} {m["heading"]["recall@1"]:>7.3f} '
+              f'{m["subheading"]["recall@1"]:>8.3f} {m["subheading"]["recall@5"]:>8.3f} {m["subheading"]["recall@10"]:>9.3f} '
+              f'{m["subheading"]["mrr"]:>8.3f} {lat["single_ms"]["p50"]:>7.2f} {lat["single_ms"]["p99"]:>7.2f} '
+              f'{lat["batch_ms"]["per_query"]:>10.2f} {r["memory"]["index_bytes"] / 1e6:>9.2f}')
+
+
+def print_comparison(results, previous):
+    """Changes against an earlier JSON report, matched by configuration."""
+    before = {r['config']: r for r in previous.get('results', [])}
+    print(f'\nCompared with {previous.get("git_commit") or "?"} ({previous.get("created_at", "?")}):')
+    print(f'{"configuration":<38} {"Δ sub R@1":>10} {"Δ sub R@10":>11} {"Δ sub MRR":>10} {"Δ p50 ms":>9}')
+    for r in results:
+        old = before.get(r['config'])
+        if old is None:
+            print(f'{r["config"]:<38} (new)')
+            continue
+        sub, old_sub = r['metrics']['subheading'], old['metrics']['subheading']
+        print(f'{r["config"]:<38} {sub["recall@1"] - old_sub["recall@1"]:>+10.3f} '
+              f'{sub["recall@10"] - old_sub["recall@10"]:>+11.3f} {sub["mrr"] - old_sub["mrr"]:>+10.3f} '
+              f'{r["latency"]["single_ms"]["p50"] - old["latency"]["single_ms"]["p50"]:>+9.2f}')
+
+
+def main():
+    import argparse
+
+    def csv_list(value):
+        return [v.strip() for v in value.split(',') if v.strip()]
+
+    parser = argparse.ArgumentParser(description='Evaluate HS search quality, latency and memory')
+    parser.add_argument('--queries', default=DEFAULT_QUERIES, help='Labelled CSV: name, category, hscode')
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='Use N proxy queries made from HS descriptions instead of --queries')
+    parser.add_argument('--backends', type=csv_list, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument('--index-types', type=csv_list, default=list(INDEX_TYPES))
+    parser.add_argument('--search-modes', type=csv_list, default=list(SEARCH_MODES))
+    parser.add_argument('--lexical', type=csv_list, default=['on', 'off'], help='on, off or both')
+    parser.add_argument('--latency-queries', type=int, default=200, help='Single-query searches timed')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON report path')
+    parser.add_argument('--compare', default=None, help='Earlier JSON report to diff against')
+    args = parser.parse_args()
+
+    for name, values, allowed in (('--index-types', args.index_types, INDEX_TYPES),
+                                  ('--search-modes', args.search_modes, SEARCH_MODES),
+                                  ('--lexical', args.lexical, ('on', 'off'))):
+        bad = [v for v in values if v not in allowed]
+        if bad:
+            parser.error(f'{name}: unknown {", ".join(bad)}; expected {", ".join(allowed)}')
+
+    if args.synthetic:
+        meta = HsMetaStore.load(MODELS_DIR)
+        queries = synthetic_queries(meta.hscode.to_pylist(), meta.description.to_pylist(), args.synthetic)
+        source = {'source': 'synthetic', 'count': len(queries)}
+    else:
+        queries = load_queries(args.queries)
+        source = {'source': os.path.relpath(args.queries, BASE_DIR), 'count': len(queries),
+                  'sha256': _file_sha256(args.queries)}
+    print(f'{len(queries)} queries ({source["source"]})')
+
+    results, skipped = run_evaluation(
+        queries, args.backends, args.index_types, args.search_modes,
+        [v == 'on' for v in args.lexical], args.latency_queries, args.batch_size)
+
+    manifest_path = os.path.join(MODELS_DIR, 'hs_build_manifest.json')
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    report = {
+        'schema_version': 1,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'queries': source,
+        'build_manifest': manifest,
+        'settings': {
+            'k': max(KS),
+            'rrf_k': hs_search.RRF_K,
+            'fusion_depth': hs_search.FUSION_DEPTH,
+            'hier_chapters': hs_search.HIER_CHAPTERS,
+            'hier_headings': hs_search.HIER_HEADINGS,
+            'latency_queries': args.latency_queries,
+            'batch_size': args.batch_size,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'faiss': getattr(faiss, '__version__', None),
+            'cpu_count': os.cpu_count(),
+        },
+        'skipped': skipped,
+        'results': results,
+    }
+    print_table(results)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f'\nWrote {args.output}')
+
 
-index_path = os.path.join(MODELS_DIR, 'hs_index.faiss')
-meta_csv = os.path.join(MODELS_DIR, 'hs_meta.csv')
-
-if not os.path.exists(index_path) or not os.path.exists(meta_csv):
-    print('Evaluation script ready. Provide input manually.')
-else:
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    index = faiss.read_index(index_path)
-    meta = pd.read_csv(meta_csv)
-
-    def suggest_hs(name, category, description, k=5):
-        q = ' '.join([str(name or ''), str(category or ''), str(description or '')]).strip().lower()
-        emb = model.encode([q], convert_to_numpy=True)
-        faiss.normalize_L2(emb)
-        D, I = index.search(emb, k)
-        results = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < 0:
-                continue
-            row = meta.iloc[int(idx)]
-            results.append({'hscode': row.get('hscode', ''), 'description': row.get('description', ''), 'score': float(score)})
-        return results
-
-    print('Evaluation script ready. Provide input manually.')
+if __name__ == '__main__':
+    main()
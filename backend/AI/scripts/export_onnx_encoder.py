@@ -0,0 +1,51 @@
+"""
+Export the sentence embedding model to ONNX for the services' ONNX Runtime backend.
+
+Writes the model to models/onnx/<model>/ (or EMBEDDING_ONNX_DIR) with
+onnx/model.onnx (fp32) and an int8 dynamically quantized copy per requested
+instruction set. The embedding registry loads them for EMBEDDING_BACKEND=onnx
+and EMBEDDING_BACKEND=onnx-int8. Requires `pip install "sentence-transformers[onnx]>=3.2"`.
+
+Usage:
+    python export_onnx_encoder.py --quantization avx2,avx512_vnni
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'services')))
+
+from common.embedding_registry import DEFAULT_MODEL_NAME, INT8_FILES, ONNX_MODELS_DIR
+
+
+def export_encoder(model_name=DEFAULT_MODEL_NAME, quantization_configs=('avx2',), out_dir=None):
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    out_dir = out_dir or os.path.join(ONNX_MODELS_DIR, model_name.replace('/', '__'))
+    started = time.perf_counter()
+    # Uses the repo's onnx/model.onnx when it has one, else exports from PyTorch
+    model = SentenceTransformer(model_name, backend='onnx')
+    model.save_pretrained(out_dir)
+    for config in quantization_configs:
+        if config not in INT8_FILES:
+            raise ValueError(f'Unknown quantization config {config!r}; expected one of {tuple(INT8_FILES)}')
+        export_dynamic_quantized_onnx_model(model, config, out_dir)
+    print(f'Exported {model_name} to {out_dir} in {time.perf_counter() - started:.1f}s')
+    for root, _, files in os.walk(os.path.join(out_dir, 'onnx')):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            print(f'  {os.path.relpath(path, out_dir)}: {os.path.getsize(path) / 1e6:.1f} MB')
+    return out_dir
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export the embedding model to ONNX (fp32 + int8)')
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--quantization', default='avx2',
+                        help=f'Comma-separated instruction sets for int8 copies: {", ".join(INT8_FILES)}')
+    parser.add_argument('--out-dir', default=None)
+    args = parser.parse_args()
+    export_encoder(args.model, [c.strip() for c in args.quantization.split(',') if c.strip()], args.out_dir)
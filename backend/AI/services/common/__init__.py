@@ -0,0 +1,4 @@
+"""Shared building blocks for the Pre-Clear AI services."""
+from .embedding_registry import DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS, get_embedding_model, is_loaded, process_memory, registry_info
+
+__all__ = ['DEFAULT_MODEL_NAME', 'EMBEDDING_BACKENDS', 'get_embedding_model', 'is_loaded', 'process_memory', 'registry_info']
@@ -0,0 +1,178 @@
+"""
+Process-wide registry of sentence embedding models.
+
+Loading SentenceTransformer('all-MiniLM-L6-v2') takes seconds and hundreds of MB,
+so every service asks this registry for its model instead of constructing one.
+Each model is loaded lazily on first use, exactly once per process, and shared
+by all threads. Load time and memory footprint are kept for introspection.
+
+The encoder runs on PyTorch by default. EMBEDDING_BACKEND=onnx runs the same
+model with ONNX Runtime, and EMBEDDING_BACKEND=onnx-int8 runs its dynamically
+quantized int8 export (see scripts/export_onnx_encoder.py). The model object
+keeps the SentenceTransformer interface whatever the backend.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch').lower()
+# Instruction set the int8 weights were quantized for; file names follow the
+# layout of the Hugging Face model repos and export_dynamic_quantized_onnx_model
+QUANTIZATION_CONFIG = os.environ.get('EMBEDDING_QUANTIZATION', 'avx2').lower()
+INT8_FILES = {
+    'arm64': 'onnx/model_qint8_arm64.onnx',
+    'avx2': 'onnx/model_quint8_avx2.onnx',
+    'avx512': 'onnx/model_qint8_avx512.onnx',
+    'avx512_vnni': 'onnx/model_qint8_avx512_vnni.onnx',
+}
+# Local exports written by scripts/export_onnx_encoder.py are preferred over the hub
+ONNX_MODELS_DIR = os.environ.get(
+    'EMBEDDING_ONNX_DIR',
+    os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'models', 'onnx')),
+)
+
+_registry_lock = threading.Lock()
+_model_locks: Dict[str, threading.Lock] = {}
+_models: Dict[str, object] = {}
+_stats: Dict[str, Dict] = {}
+
+
+def get_embedding_model(name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None):
+    """
+    Return the shared embedding model for `name`, loading it on first use.
+
+    `backend` is one of EMBEDDING_BACKENDS (default: EMBEDDING_BACKEND). Each
+    (name, backend) pair is a separate registry entry.
+
+    Concurrent callers asking for a model that is still loading wait for the
+    first load instead of starting their own.
+
+    Raises:
+        Whatever the underlying loader raises (ImportError, OSError, ...).
+        Failed loads are not cached, so the next call retries.
+        ValueError: unknown backend.
+    """
+    backend = (backend or DEFAULT_BACKEND).lower()
+    key = registry_key(name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f'Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}')
+
+    with _registry_lock:
+        lock = _model_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        try:
+            model = _load_model(name, backend)
+        except Exception as ex:
+            _stats[key] = {'loaded': False, 'backend': backend, 'error': str(ex)}
+            raise
+        load_seconds = time.perf_counter() - started
+        rss_after = _current_rss_bytes()
+
+        _stats[key] = {
+            'loaded': True,
+            'backend': backend,
+            'load_seconds': round(load_seconds, 3),
+            'loaded_at': time.time(),
+            'parameter_bytes': _parameter_bytes(model),
+            'rss_delta_bytes': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+        }
+        _models[key] = model
+        print(f"Loaded embedding model '{key}' in {load_seconds:.2f}s")
+        return model
+
+
+def registry_key(name: str, backend: str) -> str:
+    """Registry/stats key: the bare name for PyTorch, 'name[backend]' otherwise."""
+    return name if backend == 'torch' else f'{name}[{backend}]'
+
+
+def onnx_model_path(name: str) -> str:
+    """Local ONNX export of `name` under ONNX_MODELS_DIR if there is one, else `name`."""
+    local = os.path.join(ONNX_MODELS_DIR, name.replace('/', '__'))
+    return local if os.path.isdir(local) else name
+
+
+def _load_model(name: str, backend: str):
+    from sentence_transformers import SentenceTransformer
+    if backend == 'torch':
+        return SentenceTransformer(name)
+    model_kwargs = {'file_name': 'onnx/model.onnx'}
+    if backend == 'onnx-int8':
+        if QUANTIZATION_CONFIG not in INT8_FILES:
+            raise ValueError(f'Unknown EMBEDDING_QUANTIZATION {QUANTIZATION_CONFIG!r}; expected one of {tuple(INT8_FILES)}')
+        model_kwargs['file_name'] = INT8_FILES[QUANTIZATION_CONFIG]
+    return SentenceTransformer(onnx_model_path(name), backend='onnx', model_kwargs=model_kwargs)
+
+
+def is_loaded(name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None) -> bool:
+    """Whether `name` has already been loaded in this process."""
+    return registry_key(name, (backend or DEFAULT_BACKEND).lower()) in _models
+
+
+def registry_info() -> Dict:
+    """Introspection snapshot: one entry per model that was requested."""
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': _current_rss_bytes(),
+        'memory': process_memory(),
+        'models': {name: dict(stats) for name, stats in _stats.items()},
+    }
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """
+    Resident memory split into private (anonymous) and file-backed pages.
+
+    File-backed pages of memory-mapped model files are shared between worker
+    processes through the page cache; anonymous pages are per worker.
+    Linux only; other platforms report None.
+    """
+    fields = {'RssAnon': 'rss_anon_bytes', 'RssFile': 'rss_file_bytes', 'RssShmem': 'rss_shmem_bytes'}
+    memory = {name: None for name in fields.values()}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key = line.split(':', 1)[0]
+                if key in fields:
+                    memory[fields[key]] = int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return memory
+
+
+def _parameter_bytes(model) -> Optional[int]:
+    """Size of the model weights, if the model exposes torch parameters (not ONNX)."""
+    try:
+        return int(sum(p.numel() * p.element_size() for p in model.parameters())) or None
+    except Exception:
+        return None
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc, else psutil if installed)."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return None
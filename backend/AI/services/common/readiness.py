@@ -0,0 +1,115 @@
+"""
+Background warm-up and readiness reporting for the AI services.
+
+Services start serving right away and load their heavy models on a
+background thread. Each model is a named component with a state (pending,
+loading, ready, failed, disabled) that `/ready` reports. `/health` only says
+the process is up; `/ready` returns 200 once every component is usable.
+
+A failed warm-up load is retried with exponential backoff; a component that
+still fails after the last retry is listed under `failed` in the snapshot,
+with its error, so a deployment can tell "still starting" from "broken".
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+PENDING, LOADING, READY, FAILED, DISABLED = 'pending', 'loading', 'ready', 'failed', 'disabled'
+# States in which a component no longer holds up readiness
+SETTLED_OK = (READY, DISABLED)
+
+# Retries of a failed warm-up load (e.g. a model download that timed out); the
+# first waits WARMUP_RETRY_SECONDS, each next one twice as long (at most 5 min)
+WARMUP_RETRIES = int(os.environ.get('WARMUP_RETRIES', '3'))
+WARMUP_RETRY_SECONDS = float(os.environ.get('WARMUP_RETRY_SECONDS', '5'))
+MAX_RETRY_SECONDS = 300.0
+
+
+class Readiness:
+    """Thread-safe registry of named components and their warm-up state."""
+
+    def __init__(self, *components: str):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._components: Dict[str, Dict] = {}
+        for name in components:
+            self.set(name, PENDING)
+
+    def set(self, name: str, state: str, detail: Optional[str] = None, retry_in_seconds: Optional[float] = None):
+        """
+        Record `name` as `state`; `detail` is a reason (e.g. the load error).
+        A failed component with `retry_in_seconds` will be loaded again.
+        """
+        now = time.time()
+        with self._lock:
+            component = self._components.setdefault(name, {})
+            component.pop('retry_in_seconds', None)
+            if retry_in_seconds is not None:
+                component['retry_in_seconds'] = retry_in_seconds
+            if state == LOADING:
+                component['loading_since'] = now
+            elif state in (READY, FAILED) and 'loading_since' in component:
+                component['load_seconds'] = round(now - component.pop('loading_since'), 3)
+            component['state'] = state
+            component['detail'] = detail
+            if state == READY:
+                component.setdefault('ready_after_seconds', round(now - self._started, 3))
+
+    def track(self, name: str, load: Callable, retries: int = 0, backoff_seconds: float = WARMUP_RETRY_SECONDS):
+        """
+        Run `load()` as component `name`: loading -> ready, or failed.
+
+        A failed load is retried up to `retries` times, after `backoff_seconds`
+        doubling each time; in between the component is failed with
+        `retry_in_seconds`. The last error is re-raised and the component
+        stays failed.
+        """
+        for attempt in range(retries + 1):
+            self.set(name, LOADING)
+            with self._lock:
+                self._components[name]['attempts'] = attempt + 1
+            try:
+                result = load()
+            except Exception as ex:
+                if attempt == retries:
+                    self.set(name, FAILED, str(ex))
+                    raise
+                wait = min(backoff_seconds * 2 ** attempt, MAX_RETRY_SECONDS)
+                self.set(name, FAILED, str(ex), retry_in_seconds=wait)
+                time.sleep(wait)
+            else:
+                self.set(name, READY)
+                return result
+
+    def fail_pending(self, detail: str):
+        """Mark components that were never attempted as failed, e.g. after a load they depend on failed."""
+        with self._lock:
+            pending = [name for name, c in self._components.items() if c['state'] == PENDING]
+        for name in pending:
+            self.set(name, FAILED, detail)
+
+    def warm_up(self, target: Callable, name: str = 'warm-up') -> threading.Thread:
+        """Run `target` on a daemon thread so startup returns immediately."""
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(c['state'] in SETTLED_OK for c in self._components.values())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+        for component in components.values():
+            component.pop('loading_since', None)
+        return {
+            'ready': all(c['state'] in SETTLED_OK for c in components.values()),
+            # Given up on: /ready will not turn 200 without a restart or reload
+            'failed': sorted(name for name, c in components.items()
+                             if c['state'] == FAILED and 'retry_in_seconds' not in c),
+            'uptime_seconds': round(time.time() - self._started, 3),
+            'components': components,
+        }
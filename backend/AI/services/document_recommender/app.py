@@ -1,10 +1,18 @@
 from typing import List, Optional, Dict
 import logging
+import os
+import sys
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from inference.predict_hybrid import predict_documents_hybrid
+# Shared helpers live in services/common
+_SERVICES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+if _SERVICES_DIR not in sys.path:
+    sys.path.append(_SERVICES_DIR)
+
+from common.readiness import DISABLED, WARMUP_RETRIES, Readiness
 
 
 # Configure logging
@@ -14,6 +22,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upper bound on shipments accepted by /predict-documents/batch
+MAX_BATCH_SIZE = 1000
+
+# Warm-up state of the ML model, reported by /ready
+readiness = Readiness("ml_model")
+
 app = FastAPI(
     title="Pre-Clear Document Recommender",
     description="Hybrid ML + Rules Engine for Trade Compliance Document Recommendation",
@@ -38,6 +52,54 @@ class PredictResponse(BaseModel):
     explanations: Optional[Dict[str, str]] = None
 
 
+class BatchPredictRequest(BaseModel):
+    shipments: List[PredictRequest]
+
+
+class BatchPredictResponse(BaseModel):
+    results: List[PredictResponse]
+
+
+def _has_meaningful_fields(payload: PredictRequest) -> bool:
+    """At least one field the rules engine or model can act on must be provided."""
+    fields = [
+        payload.origin_country,
+        payload.destination_country,
+        payload.hs_code,
+        payload.product_category,
+        payload.product_description,
+    ]
+    return not all(not v or v == "" for v in fields)
+
+
+def _predictor():
+    """
+    The inference module, imported on first use.
+    
+    pandas, joblib and sklearn come in with it, so the warm-up thread imports
+    it in the background and requests arriving earlier wait for that import.
+    """
+    from inference import predict_hybrid
+    return predict_hybrid
+
+
+@app.on_event("startup")
+def warm_model_cache():
+    """Serve /health right away; load ML artifacts in the background, before the first request."""
+    readiness.warm_up(_warm_up, name="recommender-warm-up")
+
+
+def _warm_up():
+    try:
+        if readiness.track("ml_model", lambda: _predictor().warm_up(), retries=WARMUP_RETRIES):
+            logger.info("ML model artifacts loaded into cache")
+        else:
+            readiness.set("ml_model", DISABLED, "not trained; serving rules engine only")
+            logger.warning("ML model not trained yet; serving rules engine only")
+    except Exception as exc:
+        logger.error(f"Failed to warm ML model cache: {exc}", exc_info=True)
+
+
 @app.get("/")
 def root():
     """Health check endpoint."""
@@ -51,14 +113,21 @@ def root():
 
 @app.get("/health")
 def health():
-    """Detailed health check."""
+    """Detailed health check (liveness; see /ready for the ML model)."""
     return {
         "status": "healthy",
         "rules_engine": "active",
-        "ml_model": "loaded"
+        "ml_model": readiness.snapshot()["components"]["ml_model"]["state"]
     }
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once the ML model is loaded (or known to be untrained), else 503."""
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
 @app.post("/predict-documents", response_model=PredictResponse)
 def predict_documents(payload: PredictRequest) -> dict:
     """
@@ -80,15 +149,7 @@ def predict_documents(payload: PredictRequest) -> dict:
     )
     
     # Basic validation: require at least one meaningful field
-    fields = [
-        payload.origin_country,
-        payload.destination_country,
-        payload.hs_code,
-        payload.product_category,
-        payload.product_description,
-    ]
-    
-    if all(not v or v == "" for v in fields):
+    if not _has_meaningful_fields(payload):
         logger.warning("Rejected request: insufficient input fields")
         raise HTTPException(
             status_code=400,
@@ -97,7 +158,7 @@ def predict_documents(payload: PredictRequest) -> dict:
     
     try:
         # Run hybrid prediction
-        result = predict_documents_hybrid(
+        result = _predictor().predict_documents_hybrid(
             origin_country=payload.origin_country or "",
             destination_country=payload.destination_country or "",
             hs_code=payload.hs_code or "",
@@ -133,6 +194,49 @@ def predict_documents(payload: PredictRequest) -> dict:
         ) from exc
 
 
+@app.post("/predict-documents/batch", response_model=BatchPredictResponse)
+def predict_documents_batch(payload: BatchPredictRequest) -> dict:
+    """
+    Predict required documents for a whole shipment manifest in one call.
+    
+    Features for all shipments are built into one matrix and scored with a
+    single model call. Results are returned in the same order as `shipments`.
+    """
+    shipments = payload.shipments
+    logger.info(f"Batch document prediction request: {len(shipments)} shipments")
+    
+    if len(shipments) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(shipments)} shipments (maximum {MAX_BATCH_SIZE})."
+        )
+    
+    invalid = [i for i, shipment in enumerate(shipments) if not _has_meaningful_fields(shipment)]
+    if invalid:
+        logger.warning(f"Rejected batch: shipments {invalid} have insufficient input fields")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Shipments at positions {invalid} must provide at least one of: origin_country, destination_country, hs_code, product_category, or product_description."
+        )
+    
+    try:
+        results = _predictor().predict_documents_hybrid_batch(
+            [shipment.dict() for shipment in shipments],
+            include_explanations=True
+        )
+        
+        logger.info(f"Batch prediction successful: {len(results)} shipments")
+        
+        return {"results": results}
+    
+    except Exception as exc:
+        logger.error(f"Batch prediction failed: {exc}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch prediction failed: {str(exc)}"
+        ) from exc
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -9,6 +9,7 @@ Merges deterministic rules engine with ML predictions:
 """
 
 import os
+import threading
 import numpy as np
 import pandas as pd
 import joblib
@@ -17,7 +18,9 @@ import warnings
 warnings.filterwarnings('ignore')
 
 from engine.rules import get_rules_engine
-from training.preprocess_enhanced import create_feature_matrix
+from training.preprocess_enhanced import (
+    create_feature_matrix, build_category_lookups, category_indexes, UNKNOWN_LEGACY
+)
 
 
 DEFAULT_MODEL_PATH = os.path.join(
@@ -27,30 +30,103 @@ DEFAULT_MODEL_PATH = os.path.join(
 # Confidence threshold for ML predictions
 ML_CONFIDENCE_THRESHOLD = 0.3
 
-# Model cache
+# Model cache: abs path -> {'mtime': float, 'artifact': dict}
 _MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
 
 
 def _load_model_artifact(model_path: str = None) -> Dict:
-    """Load model artifacts with caching."""
+    """
+    Load model artifacts with caching.
+    
+    The cached artifact is reused until the file's mtime changes, so a retrained
+    model is picked up without restarting the service.
+    """
     path = model_path or DEFAULT_MODEL_PATH
     path = os.path.abspath(path)
     
-    if path in _MODEL_CACHE:
-        return _MODEL_CACHE[path]
-    
     if not os.path.exists(path):
         raise FileNotFoundError(f"Model artifact not found: {path}")
     
-    artifact = joblib.load(path)
+    mtime = os.path.getmtime(path)
+    cached = _MODEL_CACHE.get(path)
+    if cached is not None and cached['mtime'] == mtime:
+        return cached['artifact']
     
-    required_keys = {'tfidf_vectorizer', 'cat_encoders', 'mlb', 'labels'}
-    missing = required_keys - set(artifact.keys())
-    if missing:
-        raise ValueError(f"Model artifact missing keys: {missing}")
+    with _MODEL_CACHE_LOCK:
+        cached = _MODEL_CACHE.get(path)
+        if cached is not None and cached['mtime'] == mtime:
+            return cached['artifact']
+        
+        artifact = joblib.load(path)
+        
+        required_keys = {'tfidf_vectorizer', 'cat_encoders', 'mlb', 'labels'}
+        missing = required_keys - set(artifact.keys())
+        if missing:
+            raise ValueError(f"Model artifact missing keys: {missing}")
+        
+        # Artifacts trained before lookup tables were persisted
+        if 'cat_lookups' not in artifact:
+            artifact['cat_lookups'] = build_category_lookups(artifact['cat_encoders'])
+        artifact['_cat_indexes'] = category_indexes(artifact['cat_lookups'])
+        
+        _MODEL_CACHE[path] = {'mtime': mtime, 'artifact': artifact}
+        return artifact
+
+
+def _get_keras_model(artifact: Dict):
+    """
+    Return the compiled Keras model for an artifact, loading it at most once.
+    
+    The model object is kept inside the cached artifact together with the mtime
+    of `keras_model_path`; it is reloaded only when that file changes.
+    """
+    keras_model_path = artifact['keras_model_path']
+    mtime = os.path.getmtime(keras_model_path)
+    
+    if artifact.get('_keras_model') is not None and artifact.get('_keras_model_mtime') == mtime:
+        return artifact['_keras_model']
     
-    _MODEL_CACHE[path] = artifact
-    return artifact
+    with _MODEL_CACHE_LOCK:
+        if artifact.get('_keras_model') is not None and artifact.get('_keras_model_mtime') == mtime:
+            return artifact['_keras_model']
+        
+        from tensorflow import keras
+        model = keras.models.load_model(keras_model_path)
+        artifact['_keras_model'] = model
+        artifact['_keras_model_mtime'] = mtime
+        return model
+
+
+def warm_up(model_path: str = None) -> bool:
+    """
+    Load the model artifact (and Keras model, if any) into the cache.
+    
+    Called at service startup (on the warm-up thread) so the first request
+    does not pay for deserialization. One throwaway prediction also runs
+    `create_feature_matrix`, so its sklearn/scipy imports happen here too.
+    Returns False if no trained model is available.
+    """
+    try:
+        artifact = _load_model_artifact(model_path)
+        if artifact.get('model_type', 'sklearn') == 'keras':
+            _get_keras_model(artifact)
+    except FileNotFoundError:
+        return False
+    _predict_ml_documents_batch(_prepare_batch_features([{}]), artifact)
+    return True
+
+
+SHIPMENT_FIELDS = (
+    'origin_country',
+    'destination_country',
+    'hs_code',
+    'hts_flag',
+    'product_category',
+    'product_description',
+    'package_type_weight',
+    'mode_of_transport',
+)
 
 
 def _prepare_single_sample_features(
@@ -64,6 +140,24 @@ def _prepare_single_sample_features(
     mode_of_transport: str
 ) -> pd.DataFrame:
     """Prepare single sample in the same format as training data."""
+    return _prepare_batch_features([{
+        'origin_country': origin_country,
+        'destination_country': destination_country,
+        'hs_code': hs_code,
+        'hts_flag': hts_flag,
+        'product_category': product_category,
+        'product_description': product_description,
+        'package_type_weight': package_type_weight,
+        'mode_of_transport': mode_of_transport,
+    }])
+
+
+def _prepare_batch_features(shipments: List[Dict]) -> pd.DataFrame:
+    """
+    Prepare N shipments as one DataFrame in the same format as training data.
+    
+    Row order follows `shipments`.
+    """
     from training.preprocess_enhanced import (
         _normalize_text,
         _extract_hs_prefix,
@@ -71,31 +165,33 @@ def _prepare_single_sample_features(
         _extract_weight_range
     )
     
-    # Normalize inputs
-    origin = _normalize_text(origin_country)
-    destination = _normalize_text(destination_country)
-    hs_prefix = _extract_hs_prefix(hs_code)
-    hts = 'yes' if hts_flag else 'no'
-    category = _normalize_text(product_category)
-    description = _normalize_text(product_description)
-    package_type = _extract_package_type(package_type_weight)
-    weight_range = _extract_weight_range(package_type_weight)
-    mode = _normalize_text(mode_of_transport)
+    rows = []
+    for shipment in shipments:
+        package_type_weight = shipment.get('package_type_weight', '')
+        rows.append({
+            'origin_country': _normalize_text(shipment.get('origin_country', '')),
+            'destination_country': _normalize_text(shipment.get('destination_country', '')),
+            'hs_prefix': _extract_hs_prefix(shipment.get('hs_code', '')),
+            'hts_flag': 'yes' if shipment.get('hts_flag') else 'no',
+            'product_category': _normalize_text(shipment.get('product_category', '')),
+            'product_description': _normalize_text(shipment.get('product_description', '')),
+            'package_type': _extract_package_type(package_type_weight),
+            'weight_range': _extract_weight_range(package_type_weight),
+            'mode_of_transport': _normalize_text(shipment.get('mode_of_transport', '')),
+        })
     
     # Create DataFrame with same structure as training
-    features_df = pd.DataFrame([{
-        'origin_country': origin,
-        'destination_country': destination,
-        'hs_prefix': hs_prefix,
-        'hts_flag': hts,
-        'product_category': category,
-        'product_description': description,
-        'package_type': package_type,
-        'weight_range': weight_range,
-        'mode_of_transport': mode,
-    }])
-    
-    return features_df
+    return pd.DataFrame(rows, columns=[
+        'origin_country',
+        'destination_country',
+        'hs_prefix',
+        'hts_flag',
+        'product_category',
+        'product_description',
+        'package_type',
+        'weight_range',
+        'mode_of_transport',
+    ])
 
 
 def _predict_ml_documents(
@@ -109,6 +205,20 @@ def _predict_ml_documents(
     Returns:
         Dict mapping document name to confidence score
     """
+    return _predict_ml_documents_batch(features_df, artifact, threshold)[0]
+
+
+def _predict_ml_documents_batch(
+    features_df: pd.DataFrame,
+    artifact: Dict,
+    threshold: float = ML_CONFIDENCE_THRESHOLD
+) -> List[Dict[str, float]]:
+    """
+    Run ML model over every row of `features_df` with a single predict call.
+    
+    Returns:
+        One dict per row (in row order) mapping document name to confidence score
+    """
     # Extract components
     tfidf_vectorizer = artifact['tfidf_vectorizer']
     cat_encoders = artifact['cat_encoders']
@@ -120,16 +230,17 @@ def _predict_ml_documents(
         features_df,
         tfidf_vectorizer=tfidf_vectorizer,
         cat_encoders=cat_encoders,
-        fit=False
+        fit=False,
+        cat_lookups=artifact.get('_cat_indexes'),
+        # Artifacts without the key were trained with unseen categories mapped to class 0
+        unknown=artifact.get('category_unknown', UNKNOWN_LEGACY)
     )
     
-    # Predict
+    # Predict -> probabilities of shape (n_samples, n_labels)
     if model_type == 'keras':
-        from tensorflow import keras
-        keras_model_path = artifact['keras_model_path']
-        model = keras.models.load_model(keras_model_path)
+        model = _get_keras_model(artifact)
         X_dense = X.toarray()
-        probabilities = model.predict(X_dense, verbose=0)[0]
+        probabilities = model.predict(X_dense, verbose=0)
     else:
         # Sklearn model
         model = artifact['model']
@@ -138,20 +249,62 @@ def _predict_ml_documents(
             # Returns list of arrays, one per output
             proba_list = model.predict_proba(X)
             # Extract positive class probabilities
-            probabilities = np.array([p[0][1] if p.shape[1] > 1 else p[0][0] for p in proba_list])
+            probabilities = np.column_stack([p[:, 1] if p.shape[1] > 1 else p[:, 0] for p in proba_list])
         else:
             # Fallback to binary predictions
-            predictions = model.predict(X)[0]
-            probabilities = predictions.astype(float)
+            predictions = model.predict(X)
+            probabilities = np.asarray(predictions).astype(float)
     
     # Map to document names with scores above threshold
-    ml_docs = {}
-    for idx, score in enumerate(probabilities):
-        if score >= threshold:
-            doc_name = mlb.classes_[idx]
-            ml_docs[doc_name] = float(score)
+    results = []
+    for row in np.atleast_2d(probabilities):
+        ml_docs = {}
+        for idx in np.flatnonzero(row >= threshold):
+            ml_docs[mlb.classes_[idx]] = float(row[idx])
+        results.append(ml_docs)
+    
+    return results
+
+
+def _merge_results(
+    mandatory_docs: Dict[str, str],
+    ml_docs: Dict[str, float],
+    include_explanations: bool
+) -> Dict:
+    """Merge rule-based and ML documents into the response structure."""
+    # Rules always included with confidence 1.0
+    documents_with_scores = {doc: 1.0 for doc in mandatory_docs.keys()}
+    
+    # Add ML predictions (if not already in mandatory)
+    for doc, score in ml_docs.items():
+        if doc not in documents_with_scores:
+            documents_with_scores[doc] = score
+    
+    # Create explanations
+    explanations = {}
+    if include_explanations:
+        # Add rule-based explanations
+        for doc, explanation in mandatory_docs.items():
+            explanations[doc] = f"[MANDATORY] {explanation}"
+        
+        # Add ML-based explanations
+        for doc, score in ml_docs.items():
+            if doc not in mandatory_docs:
+                explanations[doc] = f"[ML PREDICTED] Confidence: {score:.2%} based on similar shipment patterns"
     
-    return ml_docs
+    # Final document list (sorted by confidence descending)
+    sorted_docs = sorted(documents_with_scores.items(), key=lambda x: x[1], reverse=True)
+    required_documents = [doc for doc, _ in sorted_docs]
+    
+    result = {
+        'required_documents': required_documents,
+        'documents_with_scores': documents_with_scores,
+    }
+    
+    if include_explanations:
+        result['explanations'] = explanations
+    
+    return result
 
 
 def predict_documents_hybrid(
@@ -222,40 +375,57 @@ def predict_documents_hybrid(
         # Log error but don't fail
         print(f"Warning: ML prediction failed: {e}")
     
-    # Step 3: Merge results
-    # Rules always included with confidence 1.0
-    documents_with_scores = {doc: 1.0 for doc in mandatory_docs.keys()}
+    # Step 3: Merge results with explanations
+    return _merge_results(mandatory_docs, ml_docs, include_explanations)
+
+
+def predict_documents_hybrid_batch(
+    shipments: List[Dict],
+    model_path: str = None,
+    include_explanations: bool = True
+) -> List[Dict]:
+    """
+    Hybrid document recommendation for many shipments at once.
     
-    # Add ML predictions (if not already in mandatory)
-    for doc, score in ml_docs.items():
-        if doc not in documents_with_scores:
-            documents_with_scores[doc] = score
+    Builds one feature matrix for all shipments and runs the ML model once;
+    the rules engine is applied to each shipment. Results are returned in the
+    same order as `shipments`, each shaped like `predict_documents_hybrid`.
     
-    # Step 4: Create explanations
-    explanations = {}
-    if include_explanations:
-        # Add rule-based explanations
-        for doc, explanation in mandatory_docs.items():
-            explanations[doc] = f"[MANDATORY] {explanation}"
-        
-        # Add ML-based explanations
-        for doc, score in ml_docs.items():
-            if doc not in mandatory_docs:
-                explanations[doc] = f"[ML PREDICTED] Confidence: {score:.2%} based on similar shipment patterns"
+    Args:
+        shipments: List of dicts keyed by SHIPMENT_FIELDS (missing keys default to empty)
+        model_path: Path to ML model artifact (optional)
+        include_explanations: Include explanation for each document
+    """
+    if not shipments:
+        return []
     
-    # Final document list (sorted by confidence descending)
-    sorted_docs = sorted(documents_with_scores.items(), key=lambda x: x[1], reverse=True)
-    required_documents = [doc for doc, _ in sorted_docs]
+    shipments = [
+        {field: shipment.get(field) or ('' if field != 'hts_flag' else False) for field in SHIPMENT_FIELDS}
+        for shipment in shipments
+    ]
     
-    result = {
-        'required_documents': required_documents,
-        'documents_with_scores': documents_with_scores,
-    }
+    # Step 1: Apply deterministic rules
+    rules_engine = get_rules_engine()
+    mandatory_per_shipment = [rules_engine.get_mandatory_documents(**shipment) for shipment in shipments]
     
-    if include_explanations:
-        result['explanations'] = explanations
+    # Step 2: Run ML model once over the whole batch
+    ml_per_shipment = [{} for _ in shipments]
+    try:
+        artifact = _load_model_artifact(model_path)
+        features_df = _prepare_batch_features(shipments)
+        ml_per_shipment = _predict_ml_documents_batch(features_df, artifact)
+    except FileNotFoundError:
+        # Model not trained yet, only use rules
+        pass
+    except Exception as e:
+        # Log error but don't fail
+        print(f"Warning: ML batch prediction failed: {e}")
     
-    return result
+    # Step 3: Merge per shipment, preserving input order
+    return [
+        _merge_results(mandatory_docs, ml_docs, include_explanations)
+        for mandatory_docs, ml_docs in zip(mandatory_per_shipment, ml_per_shipment)
+    ]
 
 
 # Simplified interface for backward compatibility
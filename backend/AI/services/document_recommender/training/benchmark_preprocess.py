@@ -0,0 +1,103 @@
+"""
+Benchmark columnar vs row-wise preprocessing on a synthetic dataset.
+
+Builds an N-row CSV by resampling required_documents_dataset.csv (with injected
+whitespace, case changes, missing values and duplicate documents so the edge
+cases are exercised), runs both preprocessing paths on it, verifies that their
+outputs are identical and prints the timings.
+
+Usage:
+    python benchmark_preprocess.py --rows 1000000
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+try:
+    from .preprocess_enhanced import REQUIRED_COLUMNS, _read_dataset, _preprocess_columns, _preprocess_rows
+except:
+    from preprocess_enhanced import REQUIRED_COLUMNS, _read_dataset, _preprocess_columns, _preprocess_rows
+
+
+def build_synthetic_dataset(n_rows: int, out_path: str, seed: int = 42) -> None:
+    """Resample the bundled dataset to `n_rows` rows and add messy variants."""
+    rng = np.random.default_rng(seed)
+    base = _read_dataset()
+    df = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+
+    text_cols = [c for c in REQUIRED_COLUMNS if c != "Required Documents"]
+    for col in text_cols:
+        values = df[col].to_numpy(dtype=object, copy=True)
+
+        # Padding / internal whitespace / case noise
+        noisy = rng.random(n_rows) < 0.05
+        values[noisy] = ["  " + str(v).upper().replace(" ", "   ") + "\t" for v in values[noisy]]
+
+        # Missing values
+        missing = rng.random(n_rows) < 0.01
+        values[missing] = np.nan
+        df[col] = values
+
+    docs = df["Required Documents"].to_numpy(dtype=object, copy=True)
+    dup = rng.random(n_rows) < 0.05
+    docs[dup] = [f"{d}; ;{d.split(';')[0]}" for d in docs[dup]]
+    docs[rng.random(n_rows) < 0.01] = np.nan
+    df["Required Documents"] = docs
+
+    # A few completely empty rows, which both paths must skip
+    empty = rng.random(n_rows) < 0.001
+    df.loc[empty, :] = np.nan
+
+    df.to_csv(out_path, index=False)
+
+
+def _digest(features_df: pd.DataFrame, labels) -> str:
+    h = hashlib.sha256()
+    h.update(features_df.to_csv(index=False).encode("utf-8"))
+    h.update(repr(labels).encode("utf-8"))
+    return h.hexdigest()
+
+
+def run_benchmark(n_rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "synthetic_documents.csv")
+
+        print(f"Building synthetic dataset with {n_rows:,} rows...")
+        build_synthetic_dataset(n_rows, csv_path)
+
+        start = time.perf_counter()
+        df = _read_dataset(csv_path)
+        read_s = time.perf_counter() - start
+        print(f"   read_csv: {read_s:.2f}s")
+
+        start = time.perf_counter()
+        cols_df, cols_labels = _preprocess_columns(df)
+        cols_s = time.perf_counter() - start
+        print(f"   columnar: {cols_s:.2f}s")
+
+        start = time.perf_counter()
+        rows_df, rows_labels = _preprocess_rows(df)
+        rows_s = time.perf_counter() - start
+        print(f"   row-wise: {rows_s:.2f}s")
+
+        assert list(cols_df.dtypes) == list(rows_df.dtypes), "dtype mismatch"
+        assert cols_df.equals(rows_df), "feature mismatch"
+        assert cols_labels == rows_labels, "label mismatch"
+        assert _digest(cols_df, cols_labels) == _digest(rows_df, rows_labels), "digest mismatch"
+
+        print(f"\nOutputs identical ({len(cols_df):,} rows kept)")
+        print(f"Speedup: {rows_s / cols_s:.1f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark dataset preprocessing")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic dataset size")
+    args = parser.parse_args()
+
+    run_benchmark(args.rows)
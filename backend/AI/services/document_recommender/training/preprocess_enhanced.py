@@ -28,6 +28,26 @@ REQUIRED_COLUMNS = [
     "Required Documents",
 ]
 
+CATEGORICAL_FEATURES = [
+    'origin_country',
+    'destination_country',
+    'hs_prefix',
+    'product_category',
+    'package_type',
+    'weight_range',
+    'mode_of_transport'
+]
+
+# How categories not seen during training are encoded (artifact key 'category_unknown'):
+# - UNKNOWN_RESERVED: code len(categories), a bucket no known category uses;
+#   artifacts written by train_model_enhanced.py from now on.
+# - UNKNOWN_LEGACY: LEGACY_UNSEEN_CODE, which is class 0 of the encoder, a real
+#   category. Only for artifacts without 'category_unknown', whose model was
+#   trained with that mapping; retrain to move them to a reserved bucket.
+UNKNOWN_RESERVED = 'reserved'
+UNKNOWN_LEGACY = 'legacy'
+LEGACY_UNSEEN_CODE = 0
+
 
 def _normalize_text(value: object) -> str:
     """Normalize text field for consistency."""
@@ -116,6 +136,12 @@ def load_and_preprocess_enhanced(csv_path: str = None) -> Tuple[pd.DataFrame, Li
         features_df: DataFrame with engineered features
         labels: List of document label lists (multi-label)
     """
+    df = _read_dataset(csv_path)
+    return _preprocess_columns(df)
+
+
+def _read_dataset(csv_path: str = None) -> pd.DataFrame:
+    """Read the raw dataset as strings and validate its columns."""
     if csv_path is None:
         csv_path = os.path.join(
             os.path.dirname(__file__), "..", "dataset", "required_documents_dataset.csv"
@@ -128,6 +154,129 @@ def load_and_preprocess_enhanced(csv_path: str = None) -> Tuple[pd.DataFrame, Li
     if missing:
         raise ValueError(f"Dataset missing required columns: {missing}")
     
+    return df
+
+
+def _normalize_text_column(col: pd.Series) -> pd.Series:
+    """Columnar _normalize_text."""
+    return (
+        col.fillna("")
+        .str.strip()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.lower()
+    )
+
+
+def _extract_hs_prefix_column(col: pd.Series, prefix_length: int = 4) -> pd.Series:
+    """Columnar _extract_hs_prefix."""
+    clean = col.fillna("").str.strip()
+    return clean.str[:prefix_length].where(clean != "", "unknown")
+
+
+def _extract_weight_range_column(col: pd.Series) -> np.ndarray:
+    """Columnar _extract_weight_range (same pattern precedence)."""
+    s = col.fillna("").str.lower()
+    conditions = [
+        s.str.contains("5–25 kg", regex=False) | s.str.contains("5-25", regex=False),
+        s.str.contains("50–200 kg", regex=False) | s.str.contains("50-200", regex=False),
+        s.str.contains("200–800 kg", regex=False) | s.str.contains("200-800", regex=False),
+        s.str.contains("1–20 mt", regex=False) | s.str.contains("1-20", regex=False),
+    ]
+    return np.select(conditions, ["light", "medium", "heavy", "very_heavy"], default="unknown")
+
+
+def _extract_package_type_column(col: pd.Series) -> np.ndarray:
+    """Columnar _extract_package_type (same pattern precedence)."""
+    s = col.fillna("").str.lower()
+    conditions = [
+        s.str.contains("pallet", regex=False),
+        s.str.contains("container", regex=False),
+        s.str.contains("carton", regex=False),
+        s.str.contains("drum", regex=False),
+    ]
+    return np.select(conditions, ["pallets", "containers", "cartons", "drums"], default="unknown")
+
+
+def _split_documents_column(col: pd.Series) -> List[List[str]]:
+    """Columnar _split_documents: each distinct raw string is split only once."""
+    split_uniques = _on_uniques(col, lambda u: [_split_documents(raw) for raw in u])
+    return [list(docs) for docs in split_uniques]
+
+
+def _on_uniques(col: pd.Series, column_func) -> np.ndarray:
+    """
+    Apply a columnar transform to the distinct values of `col` only.
+    
+    Dataset columns are low-cardinality, so transforming the uniques and
+    broadcasting back with the factorized codes avoids per-row string work.
+    Missing values are passed through `column_func` as NaN.
+    """
+    codes, uniques = pd.factorize(col)
+    # Extra trailing NaN slot: code -1 (missing) indexes it
+    values = pd.Series(np.append(np.asarray(uniques, dtype=object), np.nan), dtype=object)
+    transformed = np.empty(len(values), dtype=object)
+    for i, value in enumerate(column_func(values)):
+        transformed[i] = value
+    return transformed[codes]
+
+
+def _preprocess_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[List[str]]]:
+    """
+    Feature engineering over whole columns.
+    
+    Produces exactly the same features and labels as _preprocess_rows.
+    """
+    # Extract and normalize features
+    origin = _on_uniques(df["Origin Country"], _normalize_text_column)
+    destination = _on_uniques(df["Destination Country"], _normalize_text_column)
+    hts_flag = _on_uniques(df["HTS / Regional Tariff Flag"], _normalize_text_column)
+    category = _on_uniques(df["Product Category"], _normalize_text_column)
+    description = _on_uniques(df["Product Description"], _normalize_text_column)
+    mode = _on_uniques(df["Mode of Transport"], _normalize_text_column)
+    
+    # Extract structured features
+    hs_prefix = _on_uniques(df["HS Code"], _extract_hs_prefix_column)
+    package_type = _on_uniques(df["Package Type & Weight Range"], _extract_package_type_column)
+    weight_range = _on_uniques(df["Package Type & Weight Range"], _extract_weight_range_column)
+    
+    # Process labels
+    docs = _split_documents_column(df["Required Documents"])
+    has_docs = np.fromiter((bool(d) for d in docs), dtype=bool, count=len(docs))
+    
+    # Skip completely empty rows
+    keep = (
+        (origin != "")
+        | (destination != "")
+        | (hs_prefix != "unknown")
+        | (category != "")
+        | (description != "")
+        | has_docs
+    )
+    
+    # Build from plain lists so dtypes match the row-wise construction
+    features_df = pd.DataFrame({
+        'origin_country': origin[keep].tolist(),
+        'destination_country': destination[keep].tolist(),
+        'hs_prefix': hs_prefix[keep].tolist(),
+        'hts_flag': hts_flag[keep].tolist(),
+        'product_category': category[keep].tolist(),
+        'product_description': description[keep].tolist(),
+        'package_type': package_type[keep].tolist(),
+        'weight_range': weight_range[keep].tolist(),
+        'mode_of_transport': mode[keep].tolist(),
+    })
+    labels = [d for d, k in zip(docs, keep) if k]
+    
+    return features_df, labels
+
+
+def _preprocess_rows(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[List[str]]]:
+    """
+    Row-by-row feature engineering.
+    
+    Reference implementation kept for parity checks and benchmarks
+    (see benchmark_preprocess.py); training uses _preprocess_columns.
+    """
     # Feature engineering
     features = {
         'origin_country': [],
@@ -184,11 +333,39 @@ def load_and_preprocess_enhanced(csv_path: str = None) -> Tuple[pd.DataFrame, Li
     return features_df, labels
 
 
+def build_category_lookups(cat_encoders: Dict) -> Dict[str, List[str]]:
+    """
+    Known categories of each column, in the fitted LabelEncoders' code order.
+    
+    Plain lists, so the artifact does not depend on the pandas version;
+    `category_indexes` turns them into hash lookups once the artifact is loaded.
+    """
+    return {col: encoder.classes_.tolist() for col, encoder in cat_encoders.items()}
+
+
+def category_indexes(cat_lookups: Dict) -> Dict[str, pd.Index]:
+    """
+    Hash-based lookup tables: `index.get_indexer(values)` returns the same codes
+    as `encoder.transform` for known values and -1 for unseen ones, for a whole
+    column at once.
+    """
+    return {col: pd.Index(list(categories)) for col, categories in cat_lookups.items()}
+
+
+def encode_categories(values, index: pd.Index, unknown: str = UNKNOWN_RESERVED) -> np.ndarray:
+    """Encode a column with a lookup table; unseen values get the code `unknown` selects."""
+    codes = index.get_indexer(values)
+    codes[codes < 0] = len(index) if unknown == UNKNOWN_RESERVED else LEGACY_UNSEEN_CODE
+    return codes
+
+
 def create_feature_matrix(
     features_df: pd.DataFrame,
     tfidf_vectorizer=None,
     cat_encoders: Dict = None,
-    fit: bool = True
+    fit: bool = True,
+    cat_lookups: Dict[str, pd.Index] = None,
+    unknown: str = UNKNOWN_RESERVED
 ):
     """
     Create feature matrix from engineered features.
@@ -198,6 +375,10 @@ def create_feature_matrix(
         tfidf_vectorizer: TF-IDF vectorizer for descriptions (provide if fit=False)
         cat_encoders: Dictionary of categorical encoders (provide if fit=False)
         fit: Whether to fit encoders (True for training, False for inference)
+        cat_lookups: Precomputed lookup tables from category_indexes
+            (inference only; built from cat_encoders when omitted)
+        unknown: Code for unseen categories, UNKNOWN_RESERVED or
+            UNKNOWN_LEGACY (the artifact's 'category_unknown')
     
     Returns:
         feature_matrix: Sparse matrix ready for ML
@@ -223,18 +404,8 @@ def create_feature_matrix(
         desc_features = tfidf_vectorizer.fit_transform(features_df['product_description'])
         
         # Encode categorical features
-        categorical_features = [
-            'origin_country',
-            'destination_country',
-            'hs_prefix',
-            'product_category',
-            'package_type',
-            'weight_range',
-            'mode_of_transport'
-        ]
-        
         encoded_cats = []
-        for cat_col in categorical_features:
+        for cat_col in CATEGORICAL_FEATURES:
             encoder = LabelEncoder()
             encoded = encoder.fit_transform(features_df[cat_col].fillna('unknown'))
             cat_encoders[cat_col] = encoder
@@ -252,29 +423,14 @@ def create_feature_matrix(
         # Transform using fitted encoders
         desc_features = tfidf_vectorizer.transform(features_df['product_description'])
         
-        categorical_features = [
-            'origin_country',
-            'destination_country',
-            'hs_prefix',
-            'product_category',
-            'package_type',
-            'weight_range',
-            'mode_of_transport'
-        ]
+        if cat_lookups is None:
+            cat_lookups = category_indexes(build_category_lookups(cat_encoders))
         
         encoded_cats = []
-        for cat_col in categorical_features:
-            encoder = cat_encoders[cat_col]
-            # Handle unseen categories
+        for cat_col in CATEGORICAL_FEATURES:
+            # Whole-column hash lookup; unseen categories fall into the unknown bucket
             values = features_df[cat_col].fillna('unknown').values
-            encoded = []
-            for val in values:
-                if val in encoder.classes_:
-                    encoded.append(encoder.transform([val])[0])
-                else:
-                    # Assign to first class for unseen categories
-                    encoded.append(0)
-            encoded = np.array(encoded)
+            encoded = encode_categories(values, cat_lookups[cat_col], unknown)
             encoded_cats.append(csr_matrix(encoded.reshape(-1, 1)))
         
         # Encode HTS flag
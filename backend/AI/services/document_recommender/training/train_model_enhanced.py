@@ -20,9 +20,9 @@ import warnings
 warnings.filterwarnings('ignore')
 
 try:
-    from .preprocess_enhanced import load_and_preprocess_enhanced, create_feature_matrix
+    from .preprocess_enhanced import load_and_preprocess_enhanced, create_feature_matrix, build_category_lookups, UNKNOWN_RESERVED
 except:
-    from preprocess_enhanced import load_and_preprocess_enhanced, create_feature_matrix
+    from preprocess_enhanced import load_and_preprocess_enhanced, create_feature_matrix, build_category_lookups, UNKNOWN_RESERVED
 
 
 def compute_class_weights(Y: np.ndarray) -> np.ndarray:
@@ -229,6 +229,8 @@ def train_and_persist_enhanced(model_path: str, csv_path: str = None) -> None:
             'keras_model_path': keras_model_path,
             'tfidf_vectorizer': tfidf_vectorizer,
             'cat_encoders': cat_encoders,
+            'cat_lookups': build_category_lookups(cat_encoders),
+            'category_unknown': UNKNOWN_RESERVED,
             'mlb': mlb,
             'labels': list(mlb.classes_),
             'class_weights': class_weights,
@@ -262,6 +264,8 @@ def train_and_persist_enhanced(model_path: str, csv_path: str = None) -> None:
             'model': model,
             'tfidf_vectorizer': tfidf_vectorizer,
             'cat_encoders': cat_encoders,
+            'cat_lookups': build_category_lookups(cat_encoders),
+            'category_unknown': UNKNOWN_RESERVED,
             'mlb': mlb,
             'labels': list(mlb.classes_),
             'class_weights': class_weights,
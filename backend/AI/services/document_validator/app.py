@@ -2,16 +2,65 @@
 Document-Form Consistency Validator API
 FastAPI service for validating document content against shipment form data.
 """
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 import os
+import tempfile
 
-from ocr import extract_text
+from extraction_cache import ExtractionCache
+from ocr import extract_document, prestart_pdf_pool, shutdown_pdf_pool
 from validator import DocumentValidator
+from common.embedding_registry import get_embedding_model, registry_info
+from common.readiness import WARMUP_RETRIES, Readiness
 
 app = FastAPI(title='Document-Form Consistency Validator')
 
+# Warm-up state of the embedding model, reported by /ready
+readiness = Readiness('embedding_model')
+# Stop PDF extraction once every field the validator reads has been found
+OCR_EARLY_STOP = os.environ.get('OCR_EARLY_STOP', '1') != '0'
+# Re-validating the same file skips extraction (OCR_CACHE_MAX_MB=0 disables the cache)
+extraction_cache = ExtractionCache(
+    path=os.environ.get('OCR_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'preclear-extraction-cache.sqlite3')),
+    max_bytes=int(float(os.environ.get('OCR_CACHE_MAX_MB', '256')) * 1024 * 1024),
+)
+# Documents of one /validate-shipment request extracted at the same time
+SHIPMENT_EXTRACT_WORKERS = int(os.environ.get('SHIPMENT_EXTRACT_WORKERS', '8'))
+
+
+@app.on_event('startup')
+def start_warm_up():
+    """Serve /health right away; load the embedding model and OCR libraries in the background."""
+    readiness.warm_up(_warm_up, name='validator-warm-up')
+
+
+def _warm_up():
+    try:
+        readiness.track('embedding_model', _load_embedding_model, retries=WARMUP_RETRIES)
+    except Exception as e:
+        # Validation still runs without semantic similarity, as before
+        print(f"Warning: Failed to load embedding model: {e}")
+    try:
+        import pypdfium2  # noqa: F401  (imported on the first PDF otherwise)
+        prestart_pdf_pool()
+    except ImportError:
+        pass
+
+
+@app.on_event('shutdown')
+def stop_pdf_pool():
+    shutdown_pdf_pool()
+
+
+def _load_embedding_model():
+    model = get_embedding_model()
+    # The first forward pass initializes kernels; pay it here, not on a request
+    model.encode(['warm up'], convert_to_numpy=True)
+    return model
+
 
 class ShipmentData(BaseModel):
     origin_country: str = ''
@@ -34,6 +83,23 @@ class ValidateResponse(BaseModel):
     documentName: str
     status: str  # PASS | WARNING | FAIL
     issues: List[Dict]  # Detailed field-level issues
+    extraction: Optional[Dict] = None  # Per-page method (text layer / OCR) and timing
+
+
+class ShipmentDocument(BaseModel):
+    document_name: str
+    file_path: str
+
+
+class ValidateShipmentRequest(BaseModel):
+    shipment: ShipmentData
+    documents: List[ShipmentDocument] = Field(..., min_length=1)
+
+
+class ValidateShipmentResponse(BaseModel):
+    status: str  # Worst document status: FAIL > WARNING > PASS
+    counts: Dict[str, int]  # Documents per status
+    documents: List[ValidateResponse]  # In request order
 
 
 @app.post('/validate-document', response_model=ValidateResponse)
@@ -49,26 +115,27 @@ def validate_document(request: ValidateRequest):
     
     Only checks document-form consistency.
     """
+    validator = DocumentValidator()
     try:
         # Extract text from document
-        document_text = extract_text(request.file_path)
+        extraction = extract_document(
+            request.file_path,
+            is_complete=validator.fields_complete if OCR_EARLY_STOP else None,
+            cache=extraction_cache,
+        )
+        document_text = extraction.pop('text')
         
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Document file not found: {request.file_path}")
     
     except ValueError as e:
         # Unreadable or empty document
-        return ValidateResponse(
-            documentName=request.document_name,
-            status='FAIL',
-            issues=[f"Document unreadable: {str(e)}"]
-        )
+        return _failed_document(request.document_name, f"Document unreadable: {str(e)}")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text extraction failed: {str(e)}")
     
     # Validate consistency
-    validator = DocumentValidator()
     shipment_dict = request.shipment.dict()
     
     result = validator.validate(
@@ -77,15 +144,89 @@ def validate_document(request: ValidateRequest):
         document_name=request.document_name
     )
     
-    return ValidateResponse(**result)
+    return ValidateResponse(**result, extraction=extraction)
+
+
+@app.post('/validate-shipment', response_model=ValidateShipmentResponse)
+def validate_shipment(request: ValidateShipmentRequest):
+    """
+    Validate all documents of one shipment against its form data.
+    
+    Documents are extracted concurrently, and the product descriptions are
+    compared in one batched embedding pass (the shipment description is
+    encoded once). Each document gets the same result as /validate-document;
+    a missing or unreadable file fails that document, not the request.
+    """
+    validator = DocumentValidator()
+    is_complete = validator.fields_complete if OCR_EARLY_STOP else None
+    
+    def extract(document: ShipmentDocument):
+        try:
+            return extract_document(document.file_path, is_complete=is_complete, cache=extraction_cache)
+        except Exception as e:
+            return e
+    
+    workers = max(1, min(SHIPMENT_EXTRACT_WORKERS, len(request.documents)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        extractions = list(pool.map(extract, request.documents))
+    
+    results: List[Optional[ValidateResponse]] = [None] * len(request.documents)
+    readable = []
+    for i, (document, extraction) in enumerate(zip(request.documents, extractions)):
+        if isinstance(extraction, FileNotFoundError):
+            results[i] = _failed_document(document.document_name, f"Document file not found: {document.file_path}")
+        elif isinstance(extraction, ValueError):
+            results[i] = _failed_document(document.document_name, f"Document unreadable: {str(extraction)}")
+        elif isinstance(extraction, Exception):
+            results[i] = _failed_document(document.document_name, f"Text extraction failed: {str(extraction)}")
+        else:
+            readable.append(i)
+    
+    validated = validator.validate_shipment(
+        shipment_data=request.shipment.dict(),
+        documents=[(request.documents[i].document_name, extractions[i].pop('text')) for i in readable],
+    )
+    for i, result in zip(readable, validated):
+        results[i] = ValidateResponse(**result, extraction=extractions[i])
+    
+    counts = {status: sum(r.status == status for r in results) for status in ('PASS', 'WARNING', 'FAIL')}
+    status = 'FAIL' if counts['FAIL'] else 'WARNING' if counts['WARNING'] else 'PASS'
+    return ValidateShipmentResponse(status=status, counts=counts, documents=results)
+
+
+def _failed_document(document_name: str, message: str) -> ValidateResponse:
+    return ValidateResponse(
+        documentName=document_name,
+        status='FAIL',
+        issues=[{
+            "field": "Document Content",
+            "document_value": "UNREADABLE",
+            "shipment_value": "",
+            "severity": "FAIL",
+            "message": message
+        }]
+    )
 
 
 @app.get('/health')
 def health():
-    """Health check endpoint."""
+    """Health check endpoint (liveness: the embedding model may still be loading)."""
     return {'status': 'ok', 'service': 'document-validator'}
 
 
+@app.get('/ready')
+def ready():
+    """Readiness: 200 once the embedding model is loaded, else 503 with its state."""
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot['ready'] else 503, content=snapshot)
+
+
+@app.get('/model-info')
+def model_info():
+    """Embedding models loaded in this worker, with load time and memory footprint, and extraction cache stats."""
+    return {**registry_info(), 'extraction_cache': extraction_cache.stats()}
+
+
 @app.get('/info')
 def info():
     """Service information."""
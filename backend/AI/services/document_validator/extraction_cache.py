@@ -0,0 +1,149 @@
+"""Persistent, content-addressed cache of document text extraction results."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def file_digest(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """sha256 of the file contents (hex)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Maps (content hash, extractor version) to an extraction result: the
+    normalized text, the per-page layout (method, characters, timing) and
+    whether extraction stopped early.
+
+    Entries live in a SQLite file, so they survive restarts and are shared by
+    all workers on the host. Once the stored text and layout exceed
+    `max_bytes`, the least recently used entries are evicted. Hit/miss
+    counters are per process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, file_path: str, version: str) -> str:
+        return f'{file_digest(file_path)}:{version}'
+
+    def get(self, key: str, complete: bool = False) -> Optional[Dict]:
+        """
+        The cached result for `key`, or None on a miss. With `complete`, a
+        result that stopped early counts as a miss (the caller needs every page).
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                row = self._db().execute(
+                    'SELECT text, pages, stopped_early FROM extractions WHERE key = ?', (key,)).fetchone()
+                if row is None or (complete and row[2]):
+                    self.misses += 1
+                    return None
+                self._db().execute('UPDATE extractions SET last_used = ? WHERE key = ?', (time.time(), key))
+                self._db().commit()
+            except sqlite3.Error:
+                # A broken cache must never fail a validation; fall back to extracting
+                self.errors += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {'text': row[0], 'pages': json.loads(row[1]), 'stopped_early': bool(row[2])}
+
+    def put(self, key: str, result: Dict):
+        """Store an extraction result, then evict LRU entries over `max_bytes`."""
+        if not self.enabled:
+            return
+        pages = json.dumps(result['pages'], separators=(',', ':'))
+        size = len(result['text'].encode('utf-8')) + len(pages)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    'INSERT OR REPLACE INTO extractions (key, text, pages, stopped_early, size, created, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, result['text'], pages, int(result['stopped_early']), size, now, now))
+                self.writes += 1
+                total = db.execute('SELECT COALESCE(SUM(size), 0) FROM extractions').fetchone()[0]
+                if total > self.max_bytes:
+                    for old_key, old_size in db.execute(
+                            'SELECT key, size FROM extractions ORDER BY last_used').fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        db.execute('DELETE FROM extractions WHERE key = ?', (old_key,))
+                        total -= old_size
+                        self.evictions += 1
+                db.commit()
+            except sqlite3.Error:
+                self.errors += 1
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute('DELETE FROM extractions')
+            db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, total = 0, 0
+            if self.enabled:
+                try:
+                    entries, total = self._db().execute(
+                        'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions').fetchone()
+                except sqlite3.Error:
+                    self.errors += 1
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'entries': entries,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'errors': self.errors,
+            }
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            # WAL: readers in other workers don't block on a writer
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS extractions ('
+                'key TEXT PRIMARY KEY, text TEXT NOT NULL, pages TEXT NOT NULL, '
+                'stopped_early INTEGER NOT NULL, size INTEGER NOT NULL, '
+                'created REAL NOT NULL, last_used REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
@@ -0,0 +1,127 @@
+"""
+Single-pass field extraction for the document validator.
+
+All keyword anchors of the fields still missing are compiled into one
+alternation, so the document is scanned once instead of once per field; each
+anchor found is followed by a precompiled `match` of its field's value pattern
+right after it.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Optional
+
+# field -> (anchors as word sequences, value pattern matched right after the anchor).
+# Anchors and values are those the validator has always used; order is the output order.
+FIELD_PATTERNS = [
+    ('hs_code', [('hs', 'code'), ('product', 'code')], r'[\s:]+(\d{6,8})'),
+    ('product_description', [('product', 'description'), ('product', 'name'), ('item', 'description')],
+     r'[\s:]+([^\n]{10,200})'),
+    ('quantity', [('quantity',), ('total', 'quantity'), ('number', 'of', 'items'), ('number', 'of', 'item')],
+     r'[\s:]+(\d+(?:\.\d+)?)'),
+    ('weight', [('gross', 'weight'), ('net', 'weight'), ('total', 'weight'), ('weight',)],
+     r'[\s:]+(\d+(?:\.\d+)?)'),
+    ('package_type', [('package', 'type'), ('packaging',), ('container', 'type')], r'[\s:]+([^\n]{3,50})'),
+    ('origin_country', [('country', 'of', 'origin'), ('origin', 'country'), ('made', 'in'), ('manufactured', 'in')],
+     r'[\s:]+([^\n]{2,50})'),
+    ('destination_country', [('destination', 'country'), ('country', 'of', 'destination'), ('ship', 'to'),
+                             ('consignee', 'country')], r'[\s:]+([^\n]{2,50})'),
+    ('mode_of_transport', [('mode', 'of', 'transport'), ('transportation', 'mode'), ('method', 'of', 'transport'),
+                           ('shipment', 'mode')], r'[\s:]+([^\n]{3,30})'),
+]
+# Characters that must follow a value before appending text cannot change it: the
+# longest value each bounded pattern can match, a non-digit plus "."/digit for numbers
+_SETTLE_MARGIN = {
+    'hs_code': 8, 'product_description': 200, 'quantity': 2, 'weight': 2, 'package_type': 50,
+    'origin_country': 50, 'destination_country': 50, 'mode_of_transport': 30,
+}
+# Free-text fields are stripped; numbers and codes are returned as matched
+_STRIPPED = {'product_description', 'package_type', 'origin_country', 'destination_country', 'mode_of_transport'}
+# HS code without an anchor: any 6-8 digit number
+_HS_FALLBACK = re.compile(r'\b(\d{6,8})\b')
+
+
+class FieldExtractor:
+    """
+    Finds every field `DocumentValidator` checks in one scan of the text.
+
+    Returns exactly what one `re.search` per field would: for each field, the
+    value after its leftmost anchor that is followed by a valid value.
+
+    Once a field has its value, scanning continues with an alternation of the
+    remaining fields' anchors only (compiled once per set of missing fields
+    and cached), and stops as soon as every field has a value. Alternations
+    have no capture groups and are grouped by first character, which lets
+    `re` skip positions that cannot start an anchor; the field is looked up
+    from the words matched.
+    """
+
+    def __init__(self, field_patterns=FIELD_PATTERNS):
+        self.fields = [field for field, _, _ in field_patterns]
+        self._field_of = {}
+        self._anchors_of = defaultdict(list)
+        for field, words_list, _ in field_patterns:
+            for words in words_list:
+                self._field_of[words] = field
+                self._anchors_of[field].append(words)
+        self._values = {field: re.compile(value) for field, _, value in field_patterns}
+        self._alternations: Dict[FrozenSet[str], re.Pattern] = {}
+
+    def extract(self, text: str) -> Dict[str, Optional[str]]:
+        """Field name -> extracted value (or None if not found)."""
+        fields, _ = self._scan(text)
+        if fields['hs_code'] is None:
+            hs_match = _HS_FALLBACK.search(text)
+            fields['hs_code'] = hs_match.group(1) if hs_match else None
+        return fields
+
+    def _scan(self, text: str):
+        """Anchored fields -> value (or None), and field -> end offset of its value match."""
+        text_lower = text.lower()
+        fields: Dict[str, Optional[str]] = dict.fromkeys(self.fields)
+        ends: Dict[str, int] = {}
+        missing = frozenset(self.fields)
+        anchors = self._alternation(missing)
+        pos = 0
+        while missing:
+            anchor = anchors.search(text_lower, pos)
+            if anchor is None:
+                break
+            # Next scan from the following character: anchors may overlap (e.g. "gross weight" / "weight")
+            pos = anchor.start() + 1
+            field = self._field_of[tuple(anchor.group().split())]
+            value = self._values[field].match(text_lower, anchor.end())
+            if value is not None:
+                fields[field] = value.group(1).strip() if field in _STRIPPED else value.group(1)
+                ends[field] = value.end()
+                missing = missing - {field}
+                anchors = self._alternation(missing) if missing else None
+        return fields, ends
+
+    def _alternation(self, fields: FrozenSet[str]) -> re.Pattern:
+        pattern = self._alternations.get(fields)
+        if pattern is None:
+            by_first_char = defaultdict(list)
+            # Longest first, so e.g. "number of items" is preferred to "number of item"
+            for words in sorted((w for f in fields for w in self._anchors_of[f]),
+                                key=lambda w: len(' '.join(w)), reverse=True):
+                anchor = r'\s+'.join(re.escape(w) for w in words)
+                by_first_char[anchor[0]].append(anchor[1:])
+            pattern = re.compile('|'.join(f'{re.escape(first)}(?:{"|".join(rests)})'
+                                          for first, rests in by_first_char.items()))
+            self._alternations[fields] = pattern
+        return pattern
+
+    def is_complete(self, text: str) -> bool:
+        """
+        Whether `text`, a prefix of a longer document, already determines every
+        field: each is found after its anchor (not the HS fallback, which a
+        later anchor would override), and each value ends at least its
+        `_SETTLE_MARGIN` before the end of `text`. Open-ended values such as
+        `[^\n]{3,50}` run on into whatever text follows, so a value ending near
+        the end could still grow.
+        """
+        fields, ends = self._scan(text)
+        if any(value is None for value in fields.values()):
+            return False
+        limit = len(text.lower())
+        return all(ends[field] + _SETTLE_MARGIN[field] <= limit for field in self.fields)
@@ -3,14 +3,44 @@ OCR & Text Extraction Module
 Extracts text from PDFs and images for document validation.
 """
 import os
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
 
-def extract_text(file_path: str) -> str:
+# Minimum normalized characters for a usable document
+MIN_CONTENT_CHARS = 200
+# PDF pages whose text layer has fewer characters than this are OCR'd (scans)
+OCR_MIN_PAGE_CHARS = int(os.environ.get('OCR_MIN_PAGE_CHARS', '16'))
+# Resolution scanned PDF pages are rasterized at for OCR
+OCR_DPI = int(os.environ.get('OCR_DPI', '300'))
+# Worker processes for OCR of scanned PDF pages (1 = OCR in-process)
+PDF_WORKERS = int(os.environ.get('OCR_PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Fewer scanned pages than this are OCR'd in-process; a pool round trip costs more than it saves
+PARALLEL_MIN_PAGES = int(os.environ.get('OCR_PARALLEL_MIN_PAGES', '2'))
+# How often (in pages) the early-stop check runs over the text layer
+EARLY_STOP_EVERY_PAGES = max(1, int(os.environ.get('OCR_EARLY_STOP_EVERY', '4')))
+
+# Bump when extraction output changes, so cached results are not reused
+EXTRACTOR_VERSION = 'pdfium-tesseract-1'
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+# PDFium is not thread-safe; concurrent extractions (e.g. /validate-shipment) take turns
+_pdfium_lock = threading.Lock()
+
+
+def extract_text(file_path: str, is_complete: Optional[Callable[[str], bool]] = None) -> str:
     """
     Extract text from PDF or image file.
     
     Args:
         file_path: Absolute path to document file
+        is_complete: Optional check on the normalized text extracted so far
+            (pages in order). PDF extraction stops at the first page boundary
+            where it returns True, e.g. once every field the validator reads
+            has been found.
         
     Returns:
         Normalized extracted text (at least 200 characters)
@@ -19,46 +49,109 @@ def extract_text(file_path: str) -> str:
         FileNotFoundError: If file doesn't exist
         ValueError: If file is unreadable, empty, or has insufficient content
     """
+    return extract_document(file_path, is_complete)['text']
+
+
+def extract_document(file_path: str, is_complete: Optional[Callable[[str], bool]] = None,
+                     cache=None) -> Dict:
+    """
+    Like `extract_text`, with per-page details:
+    
+        {
+            "text": str,
+            "pages": [{"page": 1, "method": "text" | "ocr" | "skipped" | "failed",
+                       "chars": int, "seconds": float}],
+            "seconds": float,          # wall time of the whole extraction
+            "stopped_early": bool,     # is_complete was satisfied before the last page
+            "cached": bool             # served from `cache` without extracting
+        }
+    
+    "skipped" pages were not read because of the early stop; "failed" pages
+    had no text layer and could not be OCR'd (the reason is in "error").
+    
+    With an `ExtractionCache`, results are looked up by file content hash and
+    `extractor_version()`, and stored after a successful extraction.
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
     ext = os.path.splitext(file_path)[1].lower()
+    started = time.perf_counter()
+    
+    key = None
+    if cache is not None and cache.enabled:
+        key = cache.key(file_path, extractor_version())
+        # Without is_complete the caller needs every page, not an early-stopped prefix
+        cached = cache.get(key, complete=is_complete is None)
+        if cached is not None:
+            cached.update(cached=True, seconds=round(time.perf_counter() - started, 4))
+            return cached
     
     if ext == '.pdf':
-        text = _extract_from_pdf(file_path)
+        result = _extract_from_pdf(file_path, is_complete)
     elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
         text = _extract_from_image(file_path)
+        seconds = round(time.perf_counter() - started, 4)
+        result = {
+            'text': text,
+            'pages': [{'page': 1, 'method': 'ocr', 'chars': len(text), 'seconds': seconds}],
+            'stopped_early': False,
+        }
     else:
         raise ValueError(f"Unsupported file type: {ext}")
     
+    text = result['text']
     # Verify minimum content requirement
-    if len(text.strip()) < 200:
-        raise ValueError(f"Document content insufficient: {len(text)} characters (minimum 200 required)")
+    if len(text.strip()) < MIN_CONTENT_CHARS:
+        raise ValueError(f"Document content insufficient: {len(text)} characters (minimum {MIN_CONTENT_CHARS} required)")
     
-    return text
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    result['cached'] = False
+    # OCR failures may be transient (e.g. tesseract missing); don't pin them in the cache
+    if key is not None and not any(page['method'] == 'failed' for page in result['pages']):
+        cache.put(key, result)
+    return result
 
 
-def _extract_from_pdf(file_path: str) -> str:
-    """Extract text from PDF using pdfplumber."""
+def extractor_version() -> str:
+    """Extractor version plus the settings that change its output (part of cache keys)."""
+    return f'{EXTRACTOR_VERSION};dpi={OCR_DPI};min_page_chars={OCR_MIN_PAGE_CHARS}'
+
+
+def _extract_from_pdf(file_path: str, is_complete: Optional[Callable[[str], bool]] = None) -> Dict:
+    """
+    Extract text from PDF: the embedded text layer via pypdfium2, and OCR
+    (rasterized at OCR_DPI) only for pages without one, e.g. scans.
+    
+    Reading a text layer takes about a millisecond per page, so it runs
+    in-process; OCR takes seconds per page, so scanned pages are spread over
+    a pool of PDF_WORKERS processes. Pages are merged back in page order.
+    """
     try:
-        import pdfplumber
+        import pypdfium2 as pdfium
     except ImportError:
-        raise ImportError("pdfplumber not installed. Run: pip install pdfplumber")
+        raise ImportError("pypdfium2 not installed. Run: pip install pypdfium2")
     
     try:
-        text_parts = []
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                pages, texts, scanned, stopped_early = _read_text_layer(pdf, is_complete)
+            finally:
+                pdf.close()
         
-        raw_text = '\n'.join(text_parts)
+        ocr_error = None
+        if scanned:
+            ocr_stopped, ocr_error = _ocr_scanned_pages(file_path, scanned, pages, texts, is_complete)
+            stopped_early = stopped_early or ocr_stopped
+        
+        raw_text = '\n'.join(text for text in texts if text)
         
         if not raw_text or not raw_text.strip():
-            raise ValueError("PDF contains no extractable text")
+            detail = f" (OCR failed: {ocr_error})" if ocr_error else ""
+            raise ValueError(f"PDF contains no extractable text{detail}")
         
-        return _normalize_text(raw_text)
+        return {'text': _normalize_text(raw_text), 'pages': pages, 'stopped_early': stopped_early}
     
     except Exception as e:
         if isinstance(e, ValueError):
@@ -66,6 +159,189 @@ def _extract_from_pdf(file_path: str) -> str:
         raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
 
+def _read_text_layer(pdf, is_complete):
+    """
+    Text layer of each page, in order. Pages with (almost) no text are listed
+    in `scanned` for OCR; the early-stop check only runs while no scanned page
+    precedes, so it always sees a complete page-ordered prefix.
+    """
+    pages, texts, scanned = [], [], []
+    n_pages = len(pdf)
+    for i in range(n_pages):
+        started = time.perf_counter()
+        page = pdf[i]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+        if len(text.strip()) < OCR_MIN_PAGE_CHARS:
+            scanned.append(i)
+            text = ''
+        texts.append(text)
+        pages.append({'page': i + 1, 'method': 'text', 'chars': len(text),
+                      'seconds': round(time.perf_counter() - started, 4)})
+        if (is_complete and not scanned and (i + 1) % EARLY_STOP_EVERY_PAGES == 0 and i + 1 < n_pages
+                and _prefix_complete(texts, is_complete)):
+            pages.extend({'page': j + 1, 'method': 'skipped', 'chars': 0, 'seconds': 0.0}
+                         for j in range(i + 1, n_pages))
+            texts.extend('' for _ in range(i + 1, n_pages))
+            return pages, texts, scanned, True
+    return pages, texts, scanned, False
+
+
+def _ocr_scanned_pages(file_path: str, scanned: List[int], pages: List[Dict], texts: List[str], is_complete):
+    """
+    OCR the `scanned` page indices, in worker processes when there are at
+    least PARALLEL_MIN_PAGES of them, filling `pages` / `texts` in place.
+    Results are taken in page order for the early-stop check; once it passes,
+    pages not yet OCR'd are cancelled and marked skipped.
+    
+    Returns (stopped_early, error of the first failed page or None).
+    """
+    futures = {}
+    if PDF_WORKERS > 1 and len(scanned) >= PARALLEL_MIN_PAGES:
+        results = _ocr_in_pool(file_path, scanned, futures)
+    else:
+        results = ((i, _ocr_pdf_page(file_path, i, OCR_DPI)) for i in scanned)
+    
+    error = None
+    done = set()
+    pending = list(scanned)  # still to be merged, in page order
+    try:
+        for i, (text, seconds, page_error) in results:
+            texts[i] = text
+            pages[i].update(method='failed' if page_error else 'ocr', chars=len(text), seconds=seconds)
+            if page_error:
+                pages[i]['error'] = page_error
+                error = error or page_error
+            done.add(i)
+            merged = False
+            while pending and pending[0] in done:
+                pending.pop(0)
+                merged = True
+            if is_complete and merged and pending and _prefix_complete(texts[:pending[0]], is_complete):
+                for j in pending:
+                    if j not in done:
+                        pages[j].update(method='skipped', chars=0, seconds=0.0)
+                return True, error
+    finally:
+        for future in list(futures):
+            future.cancel()
+    return False, error
+
+
+def _ocr_in_pool(file_path: str, scanned: List[int], futures: Dict):
+    """
+    (page index, `_ocr_pdf_page` result) for the `scanned` pages as the
+    workers finish them. `futures` holds the running futures, for the caller
+    to cancel.
+    
+    A worker that dies (e.g. killed for memory) breaks its pool for good: the
+    pool is replaced and the pages not returned yet are OCR'd once more in the
+    new one. Pages lost to a second broken pool are returned as failed.
+    """
+    remaining = list(scanned)
+    error = None
+    for _ in range(2):
+        pool = _get_pdf_pool()
+        futures.clear()
+        try:
+            for i in remaining:
+                futures[pool.submit(_ocr_pdf_page, file_path, i, OCR_DPI)] = i
+            for future in as_completed(futures):
+                i = futures[future]
+                result = future.result()
+                remaining.remove(i)
+                yield i, result
+            return
+        except BrokenProcessPool as e:
+            _discard_pdf_pool(pool)
+            error = f"{type(e).__name__}: {e}"
+    for i in remaining:
+        yield i, ('', 0.0, error)
+
+
+def _prefix_complete(texts: List[str], is_complete) -> bool:
+    text = _normalize_text('\n'.join(t for t in texts if t))
+    return len(text) >= MIN_CONTENT_CHARS and is_complete(text)
+
+
+def _ocr_pdf_page(file_path: str, index: int, dpi: int):
+    """(text, seconds, error or None) for page `index`, rasterized at `dpi` and OCR'd."""
+    started = time.perf_counter()
+    try:
+        import pypdfium2 as pdfium
+        import pytesseract
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                page = pdf[index]
+                image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+                page.close()
+            finally:
+                pdf.close()
+        text = pytesseract.image_to_string(image) or ''
+        error = None
+    except Exception as e:
+        text, error = '', f"{type(e).__name__}: {e}"
+    return text, round(time.perf_counter() - started, 4), error
+
+
+def _init_pdf_worker():
+    # Paid once per worker, not per page
+    import pypdfium2  # noqa: F401
+    try:
+        import pytesseract  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                import multiprocessing
+                # spawn: forking a process that already runs torch threads can deadlock
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_pdf_worker,
+                )
+    return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool, so the next `_get_pdf_pool` starts a new one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def prestart_pdf_pool():
+    """Start the OCR workers now so the first scanned PDF does not pay for it."""
+    if PDF_WORKERS > 1:
+        pool = _get_pdf_pool()
+        for future in [pool.submit(_noop) for _ in range(PDF_WORKERS)]:
+            future.result()
+
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _noop():
+    return None
+
+
 def _extract_from_image(file_path: str) -> str:
     """Extract text from image using pytesseract."""
     try:
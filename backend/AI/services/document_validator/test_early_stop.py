@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test cases for early stop in PDF extraction: same fields with and without it
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import ocr
+from benchmark_pdf_extraction import write_pdf
+from validator import FIELD_EXTRACTOR
+
+
+def _filler(page, n=40):
+    return [f'Item {page:02d}-{i:02d} carton laptop computer serial SN{page * 1000 + i:06d}' for i in range(n)]
+
+
+def test_fields_near_page_boundary():
+    """Values that end a page run on into the next one in the full text; early stop must not cut them"""
+    pages = [_filler(p) for p in range(10)]
+    pages[0] = [
+        'COMMERCIAL INVOICE',
+        'HS Code: 847130',
+        'Product Description: Portable laptop computers, 14 inch',
+        'Quantity: 250',
+        'Gross Weight: 1250.5 kg',
+        'Country of Origin: China',
+        'Destination Country: Germany',
+        'Mode of Transport: Sea',
+    ] + _filler(0)
+    # Last line before the first early-stop check (page 4) / first line after it
+    pages[ocr.EARLY_STOP_EVERY_PAGES - 1].append('Package Type: Cartons')
+    pages[ocr.EARLY_STOP_EVERY_PAGES] = ['on pallets'] + _filler(4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'packing_list.pdf')
+        write_pdf(path, pages)
+        full = ocr.extract_document(path)
+        early = ocr.extract_document(path, is_complete=FIELD_EXTRACTOR.is_complete)
+
+    full_fields = FIELD_EXTRACTOR.extract(full['text'])
+    early_fields = FIELD_EXTRACTOR.extract(early['text'])
+    print("✓ Early stop - fields near a page boundary")
+    print(f"  package_type full: {full_fields['package_type']!r} | early stop: {early_fields['package_type']!r}")
+    assert full_fields['package_type'].startswith('cartons on pallets')
+    assert early_fields == full_fields, f"Early stop changed fields: {early_fields} != {full_fields}"
+    assert early['stopped_early'], "Expected extraction to stop before the last page"
+    print("  ✓ Same fields with early stop on and off")
+
+
+if __name__ == '__main__':
+    test_fields_near_page_boundary()
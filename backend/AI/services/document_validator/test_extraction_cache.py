@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test cases for the content-addressed extraction cache
+"""
+import os
+import tempfile
+
+from extraction_cache import ExtractionCache
+
+
+def _result(text, stopped_early=False):
+    return {'text': text, 'pages': [{'page': 1, 'method': 'text', 'chars': len(text), 'seconds': 0.01}],
+            'stopped_early': stopped_early}
+
+
+def test_hit_after_put():
+    """Same content + version hits; an early-stopped entry misses when every page is needed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        doc = os.path.join(tmp, 'invoice.pdf')
+        with open(doc, 'wb') as f:
+            f.write(b'%PDF-1.4 invoice bytes')
+        cache = ExtractionCache(os.path.join(tmp, 'cache.sqlite3'))
+
+        key = cache.key(doc, 'v1')
+        assert cache.get(key) is None
+        cache.put(key, _result('hs code: 847130', stopped_early=True))
+
+        cached = cache.get(key)
+        assert cached['text'] == 'hs code: 847130'
+        assert cached['pages'][0]['method'] == 'text'
+        assert cache.get(key, complete=True) is None
+        assert cache.get(cache.key(doc, 'v2')) is None
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 3, 1)
+        assert stats['hit_rate'] == 0.25
+        print("✓ Cache hit after put, keyed by content and extractor version")
+
+
+def test_lru_eviction():
+    """Over max_bytes, the least recently used entry is evicted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(os.path.join(tmp, 'cache.sqlite3'), max_bytes=500)
+        cache.put('a', _result('a' * 150))
+        cache.put('b', _result('b' * 150))
+        assert cache.get('a') is not None  # 'b' is now least recently used
+        cache.put('c', _result('c' * 150))
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] <= 500
+        print("✓ LRU entry evicted over the size bound")
+
+
+if __name__ == '__main__':
+    test_hit_after_put()
+    test_lru_eviction()
@@ -260,6 +260,49 @@ def test_insufficient_content():
     print()
 
 
+def test_validate_shipment():
+    """Test Case 7: Shipment batch gives the same result per document as validate()"""
+    validator = DocumentValidator()
+    
+    doc_template = """
+    COMMERCIAL INVOICE
+    Invoice Number: INV-2024-007
+    Product Description: {description}
+    HS Code: 847130
+    Quantity: 50
+    Gross Weight: 25 kg
+    Country of Origin: China
+    Destination Country: USA
+    Package Type: Carton
+    Mode of Transport: Sea
+    This is a detailed commercial invoice with all required information included
+    """
+    documents = [
+        ("invoice.pdf", doc_template.format(description="Widget Manufacturing Equipment")),
+        ("packing_list.pdf", doc_template.format(description="Cotton T-Shirts For Men")),
+        ("short.pdf", "Short text."),
+    ]
+    shipment_data = {
+        "hs_code": "847130",
+        "product_description": "Widget Manufacturing Equipment",
+        "quantity": "50",
+        "weight": "25",
+        "origin_country": "China",
+        "destination_country": "USA",
+        "package_type": "Carton"
+    }
+    
+    batch = validator.validate_shipment(shipment_data, documents)
+    single = [validator.validate(shipment_data, text, name) for name, text in documents]
+    print("✓ Test 7 - Shipment Batch Validation")
+    print(f"  Expected: {[r['status'] for r in single]} | Got: {[r['status'] for r in batch]}")
+    assert [r['documentName'] for r in batch] == [name for name, _ in documents]
+    assert [r['status'] for r in batch] == [r['status'] for r in single]
+    assert [[i['field'] for i in r['issues']] for r in batch] == [[i['field'] for i in r['issues']] for r in single]
+    print("  ✓ Batch results match per-document validation")
+    print()
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("STRICT DOCUMENT VALIDATOR TEST SUITE")
@@ -273,6 +316,7 @@ if __name__ == '__main__':
         test_weight_warning()
         test_missing_destination()
         test_insufficient_content()
+        test_validate_shipment()
         
         print("=" * 60)
         print("✓ ALL TESTS PASSED - STRICT VALIDATOR WORKING CORRECTLY")
@@ -3,9 +3,20 @@ STRICT Document-Form Consistency Validator
 Validates document content against shipment form data with deterministic field-level rules.
 NO semantic guessing, NO permissive matching, NO default PASS.
 """
-import re
+import os
+import sys
 from typing import Dict, List, Optional, Tuple
-from sentence_transformers import SentenceTransformer
+
+# Shared model registry lives in services/common
+_SERVICES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+if _SERVICES_DIR not in sys.path:
+    sys.path.append(_SERVICES_DIR)
+
+from common.embedding_registry import get_embedding_model
+from field_extractor import FieldExtractor
+
+# Anchors and value patterns are compiled once per process
+FIELD_EXTRACTOR = FieldExtractor()
 
 
 class DocumentValidator:
@@ -15,16 +26,18 @@ class DocumentValidator:
     """
     
     def __init__(self):
-        # Load embedding model for product description semantic similarity
+        # Embedding model for product description semantic similarity.
+        # Shared per process via the registry, so constructing a validator is cheap.
         try:
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedding_model = get_embedding_model()
         except Exception as e:
             print(f"Warning: Failed to load embedding model: {e}")
             self.embedding_model = None
         
         self.issues: List[Dict] = []
     
-    def validate(self, shipment_data: Dict, document_text: str, document_name: str) -> Dict:
+    def validate(self, shipment_data: Dict, document_text: str, document_name: str,
+                 description_similarity: Optional[float] = None) -> Dict:
         """
         STRICT validation: returns PASS only if ALL mandatory fields match exactly.
         
@@ -32,6 +45,8 @@ class DocumentValidator:
             shipment_data: Form data {hs_code, quantity, weight, origin_country, etc.}
             document_text: Raw extracted text from document
             document_name: Document file name
+            description_similarity: Precomputed product description similarity
+                (see `validate_shipment`); computed here when None
             
         Returns:
             {
@@ -61,7 +76,7 @@ class DocumentValidator:
         self._validate_hs_code(extracted_fields, shipment_data)
         self._validate_quantity(extracted_fields, shipment_data)
         self._validate_weight(extracted_fields, shipment_data)
-        self._validate_product_description(extracted_fields, shipment_data)
+        self._validate_product_description(extracted_fields, shipment_data, description_similarity)
         self._validate_package_type(extracted_fields, shipment_data)
         self._validate_origin_destination(extracted_fields, shipment_data)
         self._validate_mode_of_transport(extracted_fields, shipment_data)
@@ -71,6 +86,46 @@ class DocumentValidator:
         
         return self._build_response(document_name, status)
     
+    def validate_shipment(self, shipment_data: Dict, documents: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Validate all (document_name, document_text) of one shipment; one
+        `validate` result per document, in order.
+        
+        The shipment description and every document's description are encoded
+        in a single batched `encode` call (the shipment description once),
+        instead of one call per document.
+        """
+        similarities = self._description_similarities(shipment_data, [text for _, text in documents])
+        return [
+            self.validate(shipment_data, text, name, similarity)
+            for (name, text), similarity in zip(documents, similarities)
+        ]
+    
+    def _description_similarities(self, shipment: Dict, texts: List[str]) -> List[Optional[float]]:
+        """Similarity of each document's product description to the shipment's (None if not compared)."""
+        similarities: List[Optional[float]] = [None] * len(texts)
+        ship_desc = shipment.get('product_description', '')
+        if not ship_desc or not self.embedding_model:
+            return similarities
+        doc_descs = {}
+        for i, text in enumerate(texts):
+            if text and len(text.strip()) >= 200:
+                doc_desc = self._extract_fields(text).get('product_description')
+                if doc_desc:
+                    doc_descs[i] = doc_desc
+        if not doc_descs:
+            return similarities
+        unique = list(dict.fromkeys(doc_descs.values()))
+        try:
+            embeddings = self.embedding_model.encode([ship_desc] + unique)
+        except Exception:
+            # validate() retries per document and falls back to string matching
+            return similarities
+        by_desc = {desc: self._cosine_similarity(embeddings[0], embeddings[j + 1]) for j, desc in enumerate(unique)}
+        for i, doc_desc in doc_descs.items():
+            similarities[i] = by_desc[doc_desc]
+        return similarities
+    
     def _check_minimum_content(self, text: str) -> bool:
         """
         FAIL if document has less than 200 characters of content.
@@ -86,76 +141,23 @@ class DocumentValidator:
             return False
         return True
     
+    def fields_complete(self, text: str) -> bool:
+        """
+        Whether `text` (the pages read so far) already fixes every field
+        `_extract_fields` looks for, i.e. reading more pages cannot change them.
+        Passed to `extract_text` so extraction of long PDFs can stop early.
+        """
+        return FIELD_EXTRACTOR.is_complete(text)
+    
     def _extract_fields(self, text: str) -> Dict[str, Optional[str]]:
         """
         Extract ONLY these fields using regex + keyword anchors.
         Returns dict with field name → extracted value (or None if not found).
-        """
-        # Work with lowercase for pattern matching, preserve case in extractions
-        text_lower = text.lower()
-        
-        fields = {}
-        
-        # HS Code: 6-8 digit number (look for keyword first, then any 6-8 digit sequence)
-        hs_match = re.search(
-            r'(?:hs\s+code|hs\s+code|product\s+code)[\s:]+(\d{6,8})',
-            text_lower
-        )
-        if not hs_match:
-            # Fallback: just find any 6-8 digit sequence
-            hs_match = re.search(r'\b(\d{6,8})\b', text)
-        fields['hs_code'] = hs_match.group(1) if hs_match else None
-        
-        # Product Description: text following keyword
-        prod_match = re.search(
-            r'(?:product\s+description|product\s+name|item\s+description)[\s:]+([^\n]{10,200})',
-            text_lower
-        )
-        fields['product_description'] = prod_match.group(1).strip() if prod_match else None
-        
-        # Quantity: number following keyword
-        qty_match = re.search(
-            r'(?:quantity|total\s+quantity|number\s+of\s+items?)[\s:]+(\d+(?:\.\d+)?)',
-            text_lower
-        )
-        fields['quantity'] = qty_match.group(1) if qty_match else None
         
-        # Weight: number following "Gross Weight" or "Weight"
-        weight_match = re.search(
-            r'(?:gross\s+weight|net\s+weight|total\s+weight|weight)[\s:]+(\d+(?:\.\d+)?)',
-            text_lower
-        )
-        fields['weight'] = weight_match.group(1) if weight_match else None
-        
-        # Package Type: text following keyword
-        pkg_match = re.search(
-            r'(?:package\s+type|packaging|container\s+type)[\s:]+([^\n]{3,50})',
-            text_lower
-        )
-        fields['package_type'] = pkg_match.group(1).strip() if pkg_match else None
-        
-        # Origin Country: text following keyword
-        origin_match = re.search(
-            r'(?:country\s+of\s+origin|origin\s+country|made\s+in|manufactured\s+in)[\s:]+([^\n]{2,50})',
-            text_lower
-        )
-        fields['origin_country'] = origin_match.group(1).strip() if origin_match else None
-        
-        # Destination Country: text following keyword
-        dest_match = re.search(
-            r'(?:destination\s+country|country\s+of\s+destination|ship\s+to|consignee\s+country)[\s:]+([^\n]{2,50})',
-            text_lower
-        )
-        fields['destination_country'] = dest_match.group(1).strip() if dest_match else None
-        
-        # Mode of Transport: text following keyword
-        mode_match = re.search(
-            r'(?:mode\s+of\s+transport|transportation\s+mode|method\s+of\s+transport|shipment\s+mode)[\s:]+([^\n]{3,30})',
-            text_lower
-        )
-        fields['mode_of_transport'] = mode_match.group(1).strip() if mode_match else None
-        
-        return fields
+        HS code falls back to any 6-8 digit number; see `field_extractor` for
+        the anchors and value patterns (all matched in one pass).
+        """
+        return FIELD_EXTRACTOR.extract(text)
     
     def _validate_hs_code(self, extracted: Dict, shipment: Dict):
         """
@@ -268,7 +270,8 @@ class DocumentValidator:
                     "message": f"Weight slightly differs: difference is {diff} kg"
                 })
     
-    def _validate_product_description(self, extracted: Dict, shipment: Dict):
+    def _validate_product_description(self, extracted: Dict, shipment: Dict,
+                                      similarity: Optional[float] = None):
         """
         Product description validation using semantic similarity.
         - Similarity < 0.75 → FAIL
@@ -292,8 +295,9 @@ class DocumentValidator:
         # Try semantic similarity if model available
         if self.embedding_model:
             try:
-                embeddings = self.embedding_model.encode([ship_desc, doc_desc])
-                similarity = self._cosine_similarity(embeddings[0], embeddings[1])
+                if similarity is None:
+                    embeddings = self.embedding_model.encode([ship_desc, doc_desc])
+                    similarity = self._cosine_similarity(embeddings[0], embeddings[1])
                 
                 if similarity < 0.75:
                     self.issues.append({
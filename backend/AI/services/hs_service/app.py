@@ -1,13 +1,46 @@
 import os
-from typing import List
+import sys
+import hmac
+import json
+import hashlib
+import time
+import asyncio
+import threading
+from typing import List, Optional
 from pydantic import BaseModel
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
 
 BASE_DIR = os.path.dirname(__file__)
 # Navigate up 3 levels: hs_service -> services -> AI -> models
 MODELS_DIR = os.path.join(BASE_DIR, '..', '..', 'models')
 MODELS_DIR = os.path.normpath(MODELS_DIR)
 
+# Shared model registry lives in services/common
+SERVICES_DIR = os.path.normpath(os.path.join(BASE_DIR, '..'))
+for _path in (BASE_DIR, SERVICES_DIR):
+    if _path and _path not in sys.path:
+        sys.path.append(_path)
+
+from common.embedding_registry import get_embedding_model, registry_info
+from common.readiness import DISABLED, FAILED, READY, WARMUP_RETRIES, Readiness
+from query_cache import QueryCache
+from inference_executor import InferenceExecutor, Overloaded
+from micro_batcher import MicroBatcher
+from search import FUSION_DEPTH, HIER_CHAPTERS, HIER_HEADINGS, RRF_K, SearchResources, build_query, search
+
+# Upper bound on items accepted by /suggest-hs/batch
+MAX_BATCH_ITEMS = int(os.environ.get('HS_MAX_BATCH_ITEMS', '2000'))
+
+# Memory-map the FAISS index so uvicorn workers share one copy via the page cache
+INDEX_MMAP = os.environ.get('HS_INDEX_MMAP', '0').lower() in ('1', 'true', 'yes')
+
+# Repeated product names skip the forward pass (size 0 disables the cache)
+query_cache = QueryCache(
+    max_entries=int(os.environ.get('HS_QUERY_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.environ.get('HS_QUERY_CACHE_TTL', '3600')),
+)
+
 app = FastAPI(title='HS Code Suggestion Service')
 
 class SuggestRequest(BaseModel):
@@ -19,89 +52,445 @@ class SuggestRequest(BaseModel):
 class SuggestItem(BaseModel):
     hscode: str
     description: str
-    score: float
+    # Cosine similarity of query and description; None for code-prefix matches
+    score: Optional[float] = None
+    # 'semantic' (vector search, optionally fused with BM25) or 'code_prefix' (numeric query)
+    match: str = 'semantic'
 
 class SuggestResponse(BaseModel):
     suggestions: List[SuggestItem]
 
+class BatchSuggestRequest(BaseModel):
+    items: List[SuggestRequest]
+
+class BatchSuggestResponse(BaseModel):
+    results: List[SuggestResponse]
+
+FS_INDEX = os.path.join(MODELS_DIR, 'hs_index.faiss')
+META_PARQUET = os.path.join(MODELS_DIR, 'hs_meta.parquet')
+EMB_NPY = os.path.join(MODELS_DIR, 'embeddings.npy')
+INDEX_JSON = os.path.join(MODELS_DIR, 'hs_index.json')
+# Written last by build_hs_embeddings.py, with the sha256 of every file it served
+BUILD_MANIFEST = os.path.join(MODELS_DIR, 'hs_build_manifest.json')
+# A change to any of these triggers a reload in watch mode; the build manifest
+# is written last, so a complete build is picked up as one change
+WATCHED_FILES = ('hs_build_manifest.json', 'hs_index.faiss', 'hs_index.json', 'hs_meta.arrow', 'hs_meta.parquet',
+                 'embeddings.npy')
+
+# 'hierarchical' routes each query through chapter, then heading centroids and
+# ranks only the 6-digit subheadings underneath (uses embeddings.npy, memory-mapped)
+SEARCH_MODE = os.environ.get('HS_SEARCH_MODE', 'flat').lower()
+
+# Fuse BM25 (descriptions + code prefixes) with the vector search by reciprocal
+# rank fusion. Off by default: it changes /suggest-hs rankings, so turn it on
+# after checking it with evaluate_hs_search.py. Purely numeric queries ("8471",
+# "8471.30") never reach the encoder either way.
+LEXICAL_ENABLED = os.environ.get('HS_LEXICAL', '0').lower() in ('1', 'true', 'yes')
+
+# Poll the model files every N seconds and hot-reload on change (0 disables)
+RELOAD_WATCH_SECONDS = float(os.environ.get('HS_RELOAD_WATCH_SECONDS', '0'))
+# Required as X-Admin-Token on /admin/*; unset disables the admin endpoints
+ADMIN_TOKEN = os.environ.get('HS_ADMIN_TOKEN')
+
 model = None
-index = None
-meta = None
+resources = None
 faiss = None
 np = None
-pd = None
 load_error = None
+load_stats = {}
+reload_state = {'reloads': 0, 'failures': 0, 'in_progress': False, 'last_error': None,
+                'last_reload_at': None, 'last_reload_seconds': None, 'watch_seconds': RELOAD_WATCH_SECONDS}
+_reload_lock = threading.Lock()
+_watcher = None
+_is_inference_worker = False
+# Warm-up state per component, reported by /ready
+readiness = Readiness('embedding_model', 'hs_index')
 
 @app.on_event('startup')
-def load_resources():
-    """Load the embedding model and FAISS index if available. Never block startup."""
-    global model, index, meta, faiss, np, pd, load_error
+def start_warm_up():
+    """Serve /health right away; load the model and index on a background thread."""
+    readiness.warm_up(_warm_up, name='hs-warm-up')
 
-    # Paths
-    fs_index = os.path.join(MODELS_DIR, 'hs_index.faiss')
-    meta_csv = os.path.join(MODELS_DIR, 'hs_meta.csv')
-    emb_npy = os.path.join(MODELS_DIR, 'embeddings.npy')
+def _warm_up():
+    load_resources()
+    if inference.kind == 'process' and resources is not None:
+        # Spawn the workers (each loads its own model and index) before traffic arrives
+        readiness.track('inference_workers', inference.prestart)
+
+def load_resources():
+    """Load the embedding model and FAISS index if available. Never raises."""
+    global model, resources, faiss, np, load_error, load_stats
 
     try:
         # Import heavy deps lazily so that missing packages don't block startup
         import numpy as _np
-        import pandas as _pd
         import faiss as _faiss
-        from sentence_transformers import SentenceTransformer
 
         np = _np
-        pd = _pd
         faiss = _faiss
 
-        if not os.path.exists(fs_index) or not os.path.exists(meta_csv) or not os.path.exists(emb_npy):
+        if not os.path.exists(FS_INDEX) or not os.path.exists(META_PARQUET) or not os.path.exists(EMB_NPY):
             print('WARNING: Model files missing in', MODELS_DIR)
-            print('  Expected:', fs_index, meta_csv, emb_npy)
+            print('  Expected:', FS_INDEX, META_PARQUET, EMB_NPY)
             print('  Please run: python backend/AI/scripts/prepare_hs_data.py && python backend/AI/scripts/build_hs_embeddings.py')
+            readiness.set('embedding_model', DISABLED, 'not loaded: HS model files missing')
+            readiness.set('hs_index', FAILED, f'model files missing in {MODELS_DIR}')
             return
 
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        index = faiss.read_index(fs_index)
-        meta = pd.read_csv(meta_csv)
-        print('Loaded HS model and index. Rows:', len(meta))
+        started = time.perf_counter()
+        model = readiness.track('embedding_model', _load_model, retries=WARMUP_RETRIES)
+        model_loaded = time.perf_counter()
+        resources = readiness.track('hs_index', _load_search_resources)
+        load_stats = {
+            'index_mmap': INDEX_MMAP,
+            'model_load_seconds': round(model_loaded - started, 3),
+            'startup_seconds': round(time.perf_counter() - started, 3),
+        }
+        # Cached results belong to the previous index
+        query_cache.invalidate()
+        print('Loaded HS model and index. Rows:', len(resources.meta))
     except Exception as ex:
         load_error = ex
         model = None
-        index = None
-        meta = None
+        resources = None
+        # The index is not attempted without a model; report it failed rather than pending
+        readiness.fail_pending('not loaded: embedding model failed')
         print('ERROR: Failed to load HS model/index:', ex)
+    finally:
+        if RELOAD_WATCH_SECONDS > 0 and not _is_inference_worker:
+            _start_watcher(RELOAD_WATCH_SECONDS)
+
+def _load_model():
+    loaded = get_embedding_model()
+    # The first forward pass initializes kernels; pay it here, not on a request
+    loaded.encode(['warm up'], convert_to_numpy=True)
+    return loaded
+
+def _load_search_resources() -> SearchResources:
+    """Read the index, its search params and the metadata into a new snapshot."""
+    from meta_store import HsMetaStore
+    from lexical import Bm25Index, HsCodePrefixIndex
+
+    signature = _files_signature()
+    started = time.perf_counter()
+    manifest = _check_build_manifest()
+    index = _read_index(FS_INDEX)
+    index_loaded = time.perf_counter()
+    # Search defaults (nprobe / efSearch) persisted by build_hs_embeddings.py
+    config = {}
+    if os.path.exists(INDEX_JSON):
+        with open(INDEX_JSON) as f:
+            config = json.load(f)
+        space = faiss.ParameterSpace()
+        for name, value in config.get('search_params', {}).items():
+            space.set_index_parameter(index, name, value)
+    meta = HsMetaStore.load(MODELS_DIR)
+
+    # Refuse a half-deployed build rather than serving codes for the wrong rows
+    if index.ntotal != len(meta):
+        raise ValueError(f'Index has {index.ntotal} vectors but metadata has {len(meta)} rows')
+    # get_embedding_dimension in sentence-transformers >= 5, older releases use the long name
+    dim_fn = getattr(model, 'get_embedding_dimension', None) or getattr(model, 'get_sentence_embedding_dimension', None)
+    dim = dim_fn() if dim_fn else None
+    if dim is not None and index.d != dim:
+        raise ValueError(f'Index dimension {index.d} does not match the embedding model ({dim})')
+
+    codes = meta.hscode.to_pylist()
+    code_index = HsCodePrefixIndex(codes)
+    embeddings = hierarchy = lexical = None
+    if SEARCH_MODE == 'hierarchical' or LEXICAL_ENABLED:
+        embeddings = np.load(EMB_NPY, mmap_mode='r')
+        if embeddings.shape[0] != len(meta):
+            raise ValueError(f'embeddings.npy has {embeddings.shape[0]} rows but metadata has {len(meta)}')
+    if SEARCH_MODE == 'hierarchical':
+        from hierarchy import HsHierarchy
+        hierarchy = HsHierarchy.build(codes, embeddings)
+    if LEXICAL_ENABLED:
+        # Same candidate rows as the vector side: only subheadings in hierarchical mode
+        lexical = Bm25Index.build(codes, meta.description.to_pylist(),
+                                  rows=hierarchy.leaf_rows if hierarchy is not None else None)
+
+    # Files replaced after the manifest check (a build that just started) would be a mixed set
+    if _files_signature() != signature:
+        raise ValueError('Model files changed while loading; not swapping in a mixed build')
+
+    stats = {
+        'index_load_seconds': round(index_loaded - started, 3),
+        'loaded_at': time.time(),
+        'build_created_at': manifest.get('created_at') if manifest else None,
+    }
+    return SearchResources(index, meta, config, stats, signature, hierarchy, lexical, code_index, embeddings)
+
+def _check_build_manifest() -> Optional[dict]:
+    """
+    The build manifest, after checking that the files it lists are the ones
+    on disk. The build replaces each file atomically but not the set, and
+    writes the manifest last; while a build runs, a new index would otherwise
+    be paired with old metadata. Builds without a file list are not checked.
+    """
+    if not os.path.exists(BUILD_MANIFEST):
+        print('WARNING: no hs_build_manifest.json; loading the model files unchecked')
+        return None
+    with open(BUILD_MANIFEST) as f:
+        manifest = json.load(f)
+    for name, digest in manifest.get('files', {}).items():
+        path = os.path.join(MODELS_DIR, name)
+        if not os.path.exists(path) or _file_sha256(path) != digest:
+            raise ValueError(f'{name} does not match hs_build_manifest.json (build in progress?)')
+    return manifest
+
+def _file_sha256(path, chunk_size=1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def reload_resources(reason='manual') -> bool:
+    """
+    Load the current model files into a new snapshot and swap it in.
+
+    Queries already running keep the snapshot they started with; new queries
+    use the new one. On failure the old snapshot stays in service. Returns
+    False if the load failed or another reload was already running.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    return _reload_locked(reason)
+
+def _reload_locked(reason) -> bool:
+    """`reload_resources` for a caller that already acquired `_reload_lock`; releases it."""
+    global model, resources, load_error
+    reload_state['in_progress'] = True
+    started = time.perf_counter()
+    try:
+        if model is None:
+            model = readiness.track('embedding_model', _load_model)
+        fresh = _load_search_resources()
+    except Exception as ex:
+        reload_state['failures'] += 1
+        reload_state['last_error'] = str(ex)
+        print(f'ERROR: HS reload ({reason}) failed, keeping the current index:', ex)
+        return False
+    else:
+        # Reference swap; the query cache generation is bumped only after it,
+        # so results from the old index are never stored as current
+        resources = fresh
+        load_error = None
+        readiness.set('hs_index', READY)
+        query_cache.invalidate()
+        # Process workers hold their own copy; new calls go to fresh workers
+        inference.recycle()
+        reload_state['reloads'] += 1
+        reload_state['last_error'] = None
+        reload_state['last_reload_at'] = time.time()
+        reload_state['last_reload_seconds'] = round(time.perf_counter() - started, 3)
+        print(f'Reloaded HS index ({reason}). Rows:', len(fresh.meta))
+        return True
+    finally:
+        reload_state['in_progress'] = False
+        _reload_lock.release()
+
+def _files_signature() -> tuple:
+    signature = []
+    for name in WATCHED_FILES:
+        try:
+            st = os.stat(os.path.join(MODELS_DIR, name))
+            signature.append((name, st.st_ino, st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append((name, None))
+    return tuple(signature)
+
+def _watch_model_files(interval: float):
+    """Reload once the watched files changed and then stayed unchanged for one poll."""
+    candidate = None
+    failed = None  # don't retry the same broken build every poll
+    while True:
+        time.sleep(interval)
+        current = resources.signature if resources is not None else None
+        signature = _files_signature()
+        if signature in (current, failed):
+            candidate = None
+        elif signature != candidate:
+            # Still being written (or just finished): wait for it to settle
+            candidate = signature
+        else:
+            candidate = None
+            if not reload_resources('file change'):
+                failed = signature
+
+def _start_watcher(interval: float):
+    global _watcher
+    if _watcher is None:
+        _watcher = threading.Thread(target=_watch_model_files, args=(interval,), name='hs-reload-watch', daemon=True)
+        _watcher.start()
+
+def _read_index(path):
+    """Read the FAISS index, memory-mapped when HS_INDEX_MMAP is set."""
+    if not INDEX_MMAP:
+        return faiss.read_index(path)
+    # IO_FLAG_MMAP_IFC maps flat/IVF/HNSW storage zero-copy (faiss >= 1.8);
+    # older faiss only maps IVF inverted lists with IO_FLAG_MMAP
+    flags = [getattr(faiss, 'IO_FLAG_MMAP_IFC', None), faiss.IO_FLAG_MMAP]
+    for flag in [f for f in flags if f is not None]:
+        try:
+            return faiss.read_index(path, flag)
+        except RuntimeError as ex:
+            print('WARNING: mmap read of FAISS index failed, trying next mode:', ex)
+    return faiss.read_index(path)
+
+def _resources_ready():
+    if resources is None or model is None or faiss is None or np is None:
+        if load_error:
+            print('HS suggest called but model unavailable:', load_error)
+        return False
+    return True
+
+def _build_query(req: SuggestRequest) -> str:
+    return build_query(req.name, req.category, req.description)
+
+def _search(queries: List[str], k: int) -> List[List[dict]]:
+    """Top-k suggestions per query (see `search.search`), through the query cache."""
+    # One snapshot for the whole call, even if a reload swaps it meanwhile
+    return search(resources, model, queries, k, cache=query_cache)
+
+def _init_inference_worker():
+    """Process executor workers load their own model and index (pair with HS_INDEX_MMAP=1)."""
+    global _is_inference_worker
+    _is_inference_worker = True
+    load_resources()
+
+# Encoding + search run on a dedicated bounded pool (thread or process) so bursts
+# queue there instead of starving the event loop; beyond HS_MAX_PENDING -> 503
+inference = InferenceExecutor(
+    kind=os.environ.get('HS_EXECUTOR', 'thread').lower(),
+    max_workers=int(os.environ.get('HS_INFERENCE_WORKERS', '1')),
+    max_pending=int(os.environ.get('HS_MAX_PENDING', '64')),
+    initializer=_init_inference_worker,
+)
+OVERLOAD_RETRY_AFTER = os.environ.get('HS_OVERLOAD_RETRY_AFTER', '1')
+
+async def _search_micro_batch(items):
+    """Items are (query, k) from concurrent /suggest-hs calls: one encode + search for all."""
+    k_max = max(k for _, k in items)
+    results = await inference.run(_search, [q for q, _ in items], k_max)
+    return [found[:k] for found, (_, k) in zip(results, items)]
+
+# Single queries that arrive while the inference workers are busy (or within
+# HS_MICROBATCH_WAIT_MS of each other) share one forward pass; size 1 disables it
+micro_batcher = MicroBatcher(
+    _search_micro_batch,
+    max_batch_size=int(os.environ.get('HS_MICROBATCH_MAX_SIZE', '32')),
+    max_wait_ms=float(os.environ.get('HS_MICROBATCH_WAIT_MS', '0')),
+    max_in_flight=inference.max_workers,
+    # Waiting + in-flight queries, so HS_MAX_PENDING still bounds /suggest-hs with batching on
+    max_pending=inference.max_pending,
+)
+
+def _overloaded(ex: Overloaded) -> HTTPException:
+    print('HS inference overloaded:', ex)
+    return HTTPException(status_code=503, detail=str(ex), headers={'Retry-After': OVERLOAD_RETRY_AFTER})
 
 @app.post('/suggest-hs', response_model=SuggestResponse)
-def suggest_hs(req: SuggestRequest):
+async def suggest_hs(req: SuggestRequest):
     try:
-        if index is None or model is None or meta is None or faiss is None or np is None:
-            if load_error:
-                print('HS suggest called but model unavailable:', load_error)
+        if not _resources_ready():
             return {'suggestions': []}
 
-        q = f"{req.name or ''} {req.category or ''} {req.description or ''}".strip().lower()
-        emb = model.encode([q], convert_to_numpy=True)
-        faiss.normalize_L2(emb)
-        D, I = index.search(emb, req.k)
-        suggestions = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < 0:
-                continue
-            row = meta.iloc[int(idx)]
-            suggestions.append({'hscode': str(row.get('hscode', '')), 'description': str(row.get('description', '')), 'score': float(score)})
-        return {'suggestions': suggestions}
+        return {'suggestions': await micro_batcher.submit((_build_query(req), req.k))}
+    except Overloaded as ex:
+        raise _overloaded(ex)
     except Exception as ex:
         print('HS suggest failed:', ex)
         return {'suggestions': []}
 
+@app.post('/suggest-hs/batch', response_model=BatchSuggestResponse)
+async def suggest_hs_batch(req: BatchSuggestRequest):
+    """Suggest HS codes for many items (e.g. invoice lines); results follow request order."""
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f'Batch too large: {len(req.items)} items (maximum {MAX_BATCH_ITEMS})')
+    empty = {'results': [{'suggestions': []} for _ in req.items]}
+    try:
+        if not req.items or not _resources_ready():
+            return empty
+
+        k_max = max(item.k for item in req.items)
+        results = await inference.run(_search, [_build_query(item) for item in req.items], k_max)
+        return {'results': [{'suggestions': found[:item.k]} for item, found in zip(req.items, results)]}
+    except Overloaded as ex:
+        raise _overloaded(ex)
+    except Exception as ex:
+        print('HS batch suggest failed:', ex)
+        return empty
+
+@app.on_event('shutdown')
+def shutdown_inference():
+    inference.shutdown()
+
 @app.get('/health')
-def health():
+async def health():
+    """Liveness: the process serves requests (the model may still be loading)."""
     return {'status': 'ok'}
 
+@app.get('/ready')
+async def ready():
+    """Readiness: 200 once the model and index are loaded, else 503 with per-component state."""
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot['ready'] else 503, content=snapshot)
+
+@app.post('/admin/reload')
+async def admin_reload(wait: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Hot-reload the index and metadata from the models directory.
+
+    Returns 202 at once and loads in the background, or with `?wait=true`
+    returns after the new index is in service (500 if it could not be loaded).
+    Disabled (403) unless HS_ADMIN_TOKEN is set; 409 while a reload runs.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail='Admin endpoints are disabled (HS_ADMIN_TOKEN is not set)')
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail='Invalid admin token')
+    # Taken here, not in the worker, so a concurrent call gets 409 rather than a failed reload
+    if not _reload_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail='Reload already in progress')
+    if not wait:
+        threading.Thread(target=_reload_locked, args=('admin',), name='hs-reload', daemon=True).start()
+        return JSONResponse(status_code=202, content={'status': 'reloading'})
+    if not await asyncio.get_running_loop().run_in_executor(None, _reload_locked, 'admin'):
+        raise HTTPException(status_code=500, detail=reload_state['last_error'] or 'Reload failed')
+    return {'status': 'reloaded', 'rows': len(resources.meta), 'reload': dict(reload_state)}
+
 @app.get('/model-info')
 def model_info():
-    if meta is None:
-        return {'loaded': False}
-    return {'loaded': True, 'rows': len(meta)}
+    res = resources
+    if res is None:
+        return {'loaded': False, 'query_cache': query_cache.stats(), 'inference': inference.stats(),
+                'micro_batching': micro_batcher.stats(), 'reload': dict(reload_state),
+                'readiness': readiness.snapshot(), 'embedding_models': registry_info()}
+    return {
+        'loaded': True,
+        'rows': len(res.meta),
+        'meta_source': res.meta.source,
+        'meta_bytes': res.meta.nbytes,
+        'index_type': res.config.get('build', {}).get('index_type', 'flat'),
+        'search_params': res.config.get('search_params', {}),
+        'search_mode': 'hierarchical' if res.hierarchy is not None else 'flat',
+        'lexical': None if res.lexical is None else {**res.lexical.stats(), 'rrf_k': RRF_K, 'fusion_depth': FUSION_DEPTH},
+        'hierarchy': None if res.hierarchy is None else {
+            **res.hierarchy.stats(),
+            'top_chapters': HIER_CHAPTERS,
+            'top_headings': HIER_HEADINGS,
+            'max_dot_products_per_query': res.hierarchy.candidates_per_query(HIER_CHAPTERS, HIER_HEADINGS),
+        },
+        'query_cache': query_cache.stats(),
+        'load': {**load_stats, **res.stats},
+        'reload': dict(reload_state),
+        'inference': inference.stats(),
+        'micro_batching': micro_batcher.stats(),
+        'readiness': readiness.snapshot(),
+        'embedding_models': registry_info(),
+    }
 
 if __name__ == '__main__':
     import uvicorn
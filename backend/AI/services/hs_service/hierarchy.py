@@ -0,0 +1,121 @@
+"""Two-stage HS search: route queries through chapter/heading centroids, then rank subheadings."""
+import numpy as np
+
+
+class HsHierarchy:
+    """
+    Chapter (2-digit) -> heading (4-digit) -> leaf tree over the HS rows.
+
+    Leaves are rows whose code is not a prefix of a longer code. In practice
+    these are the 6-digit subheadings, plus the few headings that are not
+    subdivided. Chapter and heading centroids are the re-normalized mean
+    embedding of every row under that prefix.
+
+    A query first scores all chapter centroids. It then scores the heading
+    centroids of the best `top_chapters` chapters, and ranks only the leaves
+    under the best `top_headings` headings exactly. That is a few hundred dot
+    products instead of one per row.
+    """
+
+    def __init__(self, embeddings, chapter_codes, chapter_centroids, chapter_heading_offsets,
+                 heading_codes, heading_centroids, heading_leaf_offsets, leaf_rows):
+        self.embeddings = embeddings
+        self.chapter_codes = chapter_codes
+        self.chapter_centroids = chapter_centroids
+        self.chapter_heading_offsets = chapter_heading_offsets
+        self.heading_codes = heading_codes
+        self.heading_centroids = heading_centroids
+        self.heading_leaf_offsets = heading_leaf_offsets
+        self.leaf_rows = leaf_rows
+        self._chapter_headings = [np.arange(chapter_heading_offsets[c], chapter_heading_offsets[c + 1])
+                                  for c in range(len(chapter_codes))]
+
+    @classmethod
+    def build(cls, hscodes, embeddings):
+        """
+        Build from row-aligned `hscodes` and L2-normalized `embeddings` (e.g. the
+        memory-mapped embeddings.npy).
+        """
+        hscodes = np.asarray(hscodes, dtype=str)
+        prefixes = {code[:n] for code in hscodes.tolist() for n in range(2, len(code))}
+        is_leaf = np.array([code not in prefixes for code in hscodes.tolist()])
+
+        chapter_of_row = np.array([code[:2] for code in hscodes.tolist()])
+        heading_of_row = np.array([code[:4] for code in hscodes.tolist()])
+        has_heading = np.char.str_len(hscodes) >= 4
+
+        chapter_codes, chapter_idx = np.unique(chapter_of_row, return_inverse=True)
+        chapter_centroids = _centroids(embeddings, chapter_idx, len(chapter_codes))
+
+        # Headings sorted by code, hence grouped by chapter
+        heading_codes, heading_idx = np.unique(heading_of_row[has_heading], return_inverse=True)
+        heading_centroids = _centroids(embeddings[np.flatnonzero(has_heading)], heading_idx, len(heading_codes))
+        heading_chapter = np.searchsorted(chapter_codes, np.array([h[:2] for h in heading_codes.tolist()]))
+        chapter_heading_offsets = np.searchsorted(heading_chapter, np.arange(len(chapter_codes) + 1))
+
+        # Leaves grouped by heading (CSR); leaves without a heading cannot be reached
+        leaf_rows = np.flatnonzero(is_leaf & has_heading)
+        leaf_heading = np.searchsorted(heading_codes, heading_of_row[leaf_rows])
+        order = np.argsort(leaf_heading, kind='stable')
+        leaf_rows, leaf_heading = leaf_rows[order], leaf_heading[order]
+        heading_leaf_offsets = np.searchsorted(leaf_heading, np.arange(len(heading_codes) + 1))
+
+        return cls(embeddings, chapter_codes, chapter_centroids, chapter_heading_offsets,
+                   heading_codes, heading_centroids, heading_leaf_offsets, leaf_rows)
+
+    def search(self, queries, k, top_chapters=16, top_headings=12):
+        """
+        Top-k leaves per query as (scores, row ids), shaped like `index.search`
+        and padded with -1 when the selected subtree has fewer than k leaves.
+        """
+        n = queries.shape[0]
+        D = np.full((n, k), -np.inf, dtype='float32')
+        I = np.full((n, k), -1, dtype='int64')
+        chapter_scores = queries @ self.chapter_centroids.T
+        for qi in range(n):
+            q = queries[qi]
+            chapters = _top(chapter_scores[qi], top_chapters)
+            headings = np.concatenate([self._chapter_headings[c] for c in chapters])
+            if not len(headings):
+                continue
+            headings = headings[_top(self.heading_centroids[headings] @ q, top_headings)]
+            rows = np.concatenate([self.leaf_rows[self.heading_leaf_offsets[h]:self.heading_leaf_offsets[h + 1]]
+                                   for h in headings])
+            if not len(rows):
+                continue
+            rows.sort()  # sequential reads from the (memory-mapped) embeddings
+            scores = np.asarray(self.embeddings[rows]) @ q
+            best = _top(scores, k)
+            D[qi, :len(best)] = scores[best]
+            I[qi, :len(best)] = rows[best]
+        return D, I
+
+    def candidates_per_query(self, top_chapters=16, top_headings=12):
+        """Upper bound on the dot products per query, for /model-info."""
+        headings_per_chapter = np.sort(np.diff(self.chapter_heading_offsets))[::-1]
+        leaves_per_heading = np.sort(np.diff(self.heading_leaf_offsets))[::-1]
+        return int(len(self.chapter_codes) + headings_per_chapter[:top_chapters].sum()
+                   + leaves_per_heading[:top_headings].sum())
+
+    def stats(self):
+        return {
+            'chapters': len(self.chapter_codes),
+            'headings': len(self.heading_codes),
+            'leaves': len(self.leaf_rows),
+        }
+
+
+def _centroids(embeddings, group_idx, n_groups):
+    sums = np.zeros((n_groups, embeddings.shape[1]), dtype='float64')
+    np.add.at(sums, group_idx, np.asarray(embeddings, dtype='float64'))
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return (sums / np.where(norms > 0, norms, 1)).astype('float32')
+
+
+def _top(scores, n):
+    """Indices of the n highest scores, best first."""
+    if n < len(scores):
+        idx = np.argpartition(-scores, n - 1)[:n]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind='stable')]
@@ -0,0 +1,136 @@
+"""Bounded executor that runs HS inference off the event loop, with backpressure."""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_KINDS = ('thread', 'process')
+
+
+class Overloaded(Exception):
+    """Raised when `max_pending` requests are already queued or running."""
+
+
+class InferenceExecutor:
+    """
+    Runs blocking inference calls on a dedicated pool of `max_workers` threads
+    or processes, so encoding and FAISS search never occupy the event loop or
+    FastAPI's default threadpool (health checks, /model-info).
+
+    At most `max_pending` calls may be queued or running at once; further calls
+    are rejected immediately with `Overloaded` instead of piling up latency.
+    The pool is created on first use; process workers run `initializer` once
+    (e.g. to load the model and index).
+    """
+
+    def __init__(self, kind='thread', max_workers=1, max_pending=64, initializer=None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f'Unknown executor kind {kind!r}; expected one of {EXECUTOR_KINDS}')
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.initializer = initializer
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == 'process':
+                        import multiprocessing
+                        # spawn: forking a process that already runs torch threads can deadlock
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context('spawn'),
+                            initializer=self.initializer,
+                        )
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hs-inference')
+        return self._pool
+
+    async def run(self, fn, *args):
+        """
+        Run `fn(*args)` on the pool and await its result.
+
+        Raises:
+            Overloaded: `max_pending` calls are already queued or running.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded(f'{self.pending} inference requests pending (limit {self.max_pending})')
+            self.pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            future = self._get_pool().submit(functools.partial(fn, *args))
+        except Exception:
+            self._release(None)
+            raise
+        # Released when the work finishes, even if the awaiting request was cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def prestart(self):
+        """
+        Start every worker now and wait until each has run `initializer`, so
+        the first requests don't pay for it. No-op for thread pools.
+        """
+        if self.kind != 'process':
+            return
+        pool = self._get_pool()
+        for future in [pool.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+
+    def recycle(self):
+        """
+        Send new calls to a fresh process pool, e.g. after the model files were
+        reloaded. The old workers finish their queued calls, then exit.
+        Thread pools share the caller's state and are left as they are.
+        """
+        if self.kind != 'process':
+            return
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'queue_depth': max(0, self.pending - self.max_workers),
+                'in_flight': min(self.pending, self.max_workers),
+                'peak_pending': self.peak_pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+
+def _noop():
+    return None
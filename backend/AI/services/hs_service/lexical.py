@@ -0,0 +1,144 @@
+"""Lexical retrieval for the HS service: BM25 inverted index, code-prefix lookup and rank fusion."""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+# Queries made only of digits and separators, e.g. "8471", "8471.30", "84 71 30"
+_NUMERIC_QUERY = re.compile(r'^[\d\s.\-]+$')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def code_prefixes(code):
+    """Chapter/heading/subheading prefixes of an HS code, e.g. 847130 -> 84, 8471, 847130."""
+    return [code[:n] for n in (2, 4, 6) if len(code) >= n] or [code]
+
+
+class Bm25Index:
+    """
+    Okapi BM25 over HS descriptions, as a CSR inverted index of precomputed
+    per-(term, row) weights, so a query costs one gather-add per query term.
+
+    Each row is indexed with its description tokens plus its code prefixes,
+    so "8471" in a free-text query matches heading 8471 and its subheadings.
+    """
+
+    def __init__(self, vocab, offsets, rows, weights, n_rows):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, codes, descriptions, rows=None, k1=1.2, b=0.75):
+        """Index `rows` (default: all) of the row-aligned `codes` / `descriptions`."""
+        rows = np.arange(len(codes)) if rows is None else np.asarray(rows)
+        term_freqs = []
+        for row in rows.tolist():
+            term_freqs.append(Counter(tokenize(descriptions[row]) + code_prefixes(codes[row])))
+        doc_len = np.array([sum(tf.values()) for tf in term_freqs], dtype='float64')
+        avg_len = doc_len.mean() if len(doc_len) else 1.0
+
+        postings = {}
+        for doc, tf in enumerate(term_freqs):
+            for term, freq in tf.items():
+                postings.setdefault(term, []).append((doc, freq))
+
+        n_docs = len(term_freqs)
+        vocab = {}
+        offsets = [0]
+        post_rows = []
+        post_weights = []
+        for term, plist in postings.items():
+            vocab[term] = len(vocab)
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            docs = np.array([d for d, _ in plist])
+            freqs = np.array([f for _, f in plist], dtype='float64')
+            norm = k1 * (1 - b + b * doc_len[docs] / avg_len)
+            post_rows.append(rows[docs])
+            post_weights.append(idf * freqs * (k1 + 1) / (freqs + norm))
+            offsets.append(offsets[-1] + len(plist))
+
+        return cls(
+            vocab,
+            np.array(offsets, dtype='int64'),
+            np.concatenate(post_rows).astype('int64') if post_rows else np.zeros(0, dtype='int64'),
+            np.concatenate(post_weights).astype('float32') if post_weights else np.zeros(0, dtype='float32'),
+            len(codes),
+        )
+
+    def search(self, query, n):
+        """
+        Best `n` (row ids, BM25 scores) for `query`, best first; empty if no term matches.
+
+        Scores are summed over the query terms' posting rows only, so a query
+        costs O(postings touched), not O(rows in the table).
+        """
+        spans = []
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is not None:
+                spans.append((self.offsets[term_id], self.offsets[term_id + 1]))
+        if not spans:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32')
+        if len(spans) == 1:
+            # Rows are unique within a posting list
+            start, end = spans[0]
+            hits, scores = self.rows[start:end], self.weights[start:end]
+        else:
+            rows = np.concatenate([self.rows[start:end] for start, end in spans])
+            weights = np.concatenate([self.weights[start:end] for start, end in spans])
+            hits, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights).astype('float32')
+        if len(hits) > n:
+            top = np.argpartition(-scores, n - 1)[:n]
+            hits, scores = hits[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return hits[order], scores[order]
+
+    def stats(self):
+        return {'terms': len(self.vocab), 'postings': int(len(self.rows))}
+
+
+class HsCodePrefixIndex:
+    """Exact code-prefix lookup over sorted codes; answers numeric queries without the encoder."""
+
+    def __init__(self, codes):
+        codes = np.asarray(codes, dtype=str)
+        self.order = np.argsort(codes, kind='stable')
+        self.sorted_codes = codes[self.order]
+
+    @staticmethod
+    def parse(query):
+        """Digits of a purely numeric query (2-10 digits), else None."""
+        if not _NUMERIC_QUERY.match(query):
+            return None
+        digits = re.sub(r'\D', '', query)
+        return digits if 2 <= len(digits) <= 10 else None
+
+    def lookup(self, prefix, k):
+        """
+        Up to k rows whose code starts with `prefix`, in code order, so the
+        exact code precedes its subheadings.
+        """
+        start = np.searchsorted(self.sorted_codes, prefix, side='left')
+        end = np.searchsorted(self.sorted_codes, prefix + '\uffff', side='left')
+        return [int(self.order[i]) for i in range(start, min(end, start + k))]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse ranked lists of row ids: score(row) = sum over lists of 1 / (k + rank).
+    Returns row ids, best first (ties keep first-seen order).
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
@@ -0,0 +1,76 @@
+"""Columnar HS metadata (hscode + description) for result gathering in the HS service."""
+import os
+
+import numpy as np
+import pyarrow as pa
+
+
+class HsMetaStore:
+    """
+    Keeps only the `hscode` and `description` columns as Arrow string arrays
+    (one UTF-8 buffer + offsets each) and gathers search hits by row id with a
+    single vectorized `take`.
+    """
+
+    def __init__(self, hscode, description, source):
+        self.hscode = hscode
+        self.description = description
+        self.source = source
+
+    @classmethod
+    def load(cls, models_dir):
+        """
+        Load from the first available of hs_meta.arrow (memory-mapped, zero-copy),
+        hs_meta.parquet or hs_meta.csv.
+        """
+        arrow_path = os.path.join(models_dir, 'hs_meta.arrow')
+        parquet_path = os.path.join(models_dir, 'hs_meta.parquet')
+        csv_path = os.path.join(models_dir, 'hs_meta.csv')
+
+        if os.path.exists(arrow_path):
+            table = pa.ipc.open_file(pa.memory_map(arrow_path, 'r')).read_all()
+            source = arrow_path
+        elif os.path.exists(parquet_path):
+            import pyarrow.parquet as pq
+            table = pq.read_table(parquet_path, columns=['hscode', 'description'])
+            source = parquet_path
+        elif os.path.exists(csv_path):
+            import pandas as pd
+            df = pd.read_csv(csv_path, usecols=['hscode', 'description'], dtype=str, keep_default_na=False)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            source = csv_path
+        else:
+            raise FileNotFoundError(f'No HS metadata (hs_meta.arrow/.parquet/.csv) in {models_dir}')
+
+        return cls(
+            _as_string_array(table.column('hscode')),
+            _as_string_array(table.column('description')),
+            source,
+        )
+
+    def __len__(self):
+        return len(self.hscode)
+
+    @property
+    def nbytes(self):
+        return self.hscode.nbytes + self.description.nbytes
+
+    def gather(self, ids):
+        """Return (hscodes, descriptions) as Python lists for row ids `ids`."""
+        ids = pa.array(np.asarray(ids, dtype=np.int64))
+        return self.hscode.take(ids).to_pylist(), self.description.take(ids).to_pylist()
+
+
+def _as_string_array(column):
+    """Single contiguous string array (nulls as empty strings)."""
+    if isinstance(column, pa.ChunkedArray):
+        # A single chunk (e.g. memory-mapped IPC) is used as-is, without copying
+        array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    else:
+        array = column
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        array = array.cast(pa.string())
+    if array.null_count:
+        import pyarrow.compute as pc
+        array = pc.fill_null(array, '')
+    return array
@@ -0,0 +1,176 @@
+"""Dynamic micro-batching of concurrent HS queries into one encode + search."""
+import asyncio
+import math
+import threading
+import time
+from collections import Counter, deque
+
+from inference_executor import Overloaded
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from concurrent requests and processes them together.
+
+    A batch is flushed when `max_batch_size` items are waiting or `max_wait_ms`
+    after its first item arrived, whichever comes first (`max_wait_ms=0`
+    dispatches at once). While `max_in_flight` batches are already being
+    processed, new items keep accumulating and go out as one batch when a slot
+    frees up, so batches grow with load instead of queueing behind each other.
+    `max_batch_size=1` disables batching.
+
+    At most `max_pending` items may be waiting or in flight at once (counted
+    per item, not per batch); `submit` rejects further items with `Overloaded`.
+
+    `process` is an async callable taking the list of items and returning one
+    result per item, in order; each submitter gets its own result (or the
+    batch's exception). All scheduling happens on the event loop; no extra
+    threads are involved.
+    """
+
+    def __init__(self, process, max_batch_size=32, max_wait_ms=5.0, max_in_flight=1, max_pending=None,
+                 latency_window=10000):
+        self.process = process
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_pending = max(1, max_pending) if max_pending is not None else None
+        self._waiting = []  # (item, future, submitted_at)
+        self._timer = None
+        self._in_flight = 0
+        self._items_in_flight = 0
+        self._tasks = set()
+        self._stats_lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=latency_window)
+        self._latency_buckets = Counter()
+        self._batch_sizes = Counter()
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return self.max_batch_size > 1
+
+    async def submit(self, item):
+        """
+        Queue `item` for the next batch and wait for its result.
+
+        Raises:
+            Overloaded: `max_pending` items are already waiting or in flight.
+        """
+        pending = len(self._waiting) + self._items_in_flight
+        if self.max_pending is not None and pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f'{pending} queries pending (limit {self.max_pending})')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append((item, future, time.perf_counter()))
+        if self.max_wait_ms <= 0 or len(self._waiting) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting:
+            # Busy: the waiting items are sent when the running batch completes
+            if self.enabled and self._in_flight >= self.max_in_flight:
+                return
+            batch = self._waiting[:self.max_batch_size]
+            self._waiting = self._waiting[self.max_batch_size:]
+            self._in_flight += 1
+            self._items_in_flight += len(batch)
+            task = asyncio.ensure_future(self._run(batch))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.process([item for item, _, _ in batch])
+        except Exception as ex:
+            self._finish(batch)
+            self._record(batch, failed=True)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        self._finish(batch)
+        self._record(batch)
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _finish(self, batch):
+        self._in_flight -= 1
+        self._items_in_flight -= len(batch)
+        if self._waiting:
+            self._flush()
+
+    def _record(self, batch, failed=False):
+        now = time.perf_counter()
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            if failed:
+                self.failed_batches += 1
+                return
+            for _, _, submitted_at in batch:
+                latency_ms = (now - submitted_at) * 1000
+                self._latencies_ms.append(latency_ms)
+                self._latency_buckets[_bucket(latency_ms)] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies_ms)
+            return {
+                'enabled': self.enabled,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'max_in_flight': self.max_in_flight,
+                'max_pending': self.max_pending,
+                'waiting': len(self._waiting),
+                'in_flight': self._in_flight,
+                'items_in_flight': self._items_in_flight,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'items': self.items,
+                'failed_batches': self.failed_batches,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'batch_size_histogram': {str(size): n for size, n in sorted(self._batch_sizes.items())},
+                'latency_ms': {
+                    'samples': len(latencies),
+                    'p50': _percentile(latencies, 50),
+                    'p90': _percentile(latencies, 90),
+                    'p99': _percentile(latencies, 99),
+                    'max': round(latencies[-1], 2) if latencies else None,
+                },
+                'latency_histogram_ms': {
+                    label: self._latency_buckets[label]
+                    for label in [f'<={b}' for b in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}']
+                },
+            }
+
+
+def _bucket(latency_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return f'<={bound}'
+    return f'>{LATENCY_BUCKETS_MS[-1]}'
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return round(sorted_values[rank], 2)
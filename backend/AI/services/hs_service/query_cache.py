@@ -0,0 +1,93 @@
+"""Bounded LRU + TTL cache of query embeddings and search results for the HS service."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Maps a normalized query string to (embedding, suggestions, k searched).
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted once `max_entries` is reached. `invalidate()` drops everything and
+    bumps the generation, so results computed against an index that has since
+    been replaced are never stored.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        # Found, but searched with a smaller k: only the embedding is reused
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, query, k):
+        """
+        Return (embedding, suggestions, k searched) for `query`, or None on a
+        miss. An entry searched with fewer than `k` results is still returned
+        (its embedding spares the forward pass) but counted as a partial hit,
+        since the caller has to search again.
+        """
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[query]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query)
+            if value[2] >= k:
+                self.hits += 1
+            else:
+                self.partial_hits += 1
+            return value
+
+    def put(self, query, embedding, suggestions, k, generation):
+        """Store a result computed while `generation` was current."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[query] = (time.monotonic() + self.ttl_seconds, (embedding, suggestions, k))
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop all entries, e.g. after the FAISS index was (re)loaded."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.partial_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'partial_hits': self.partial_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'generation': self.generation,
+            }
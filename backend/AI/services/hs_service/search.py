@@ -0,0 +1,138 @@
+"""
+HS code search pipeline shared by the service (app.py) and
+scripts/evaluate_hs_search.py, so the evaluation measures exactly what
+/suggest-hs returns.
+
+A search runs on a `SearchResources` snapshot and an encoder passed in by the
+caller; numpy and faiss are imported on first use, so importing this module
+stays cheap for the service's startup.
+"""
+import os
+from typing import List, NamedTuple
+
+# Queries per model forward pass when encoding a batch
+ENCODE_BATCH_SIZE = int(os.environ.get('HS_ENCODE_BATCH_SIZE', '64'))
+# Hierarchical mode: chapters, then headings within them, kept before ranking subheadings
+HIER_CHAPTERS = int(os.environ.get('HS_HIER_CHAPTERS', '16'))
+HIER_HEADINGS = int(os.environ.get('HS_HIER_HEADINGS', '12'))
+# Reciprocal rank fusion constant and candidates taken from each side before fusion
+RRF_K = int(os.environ.get('HS_RRF_K', '60'))
+FUSION_DEPTH = int(os.environ.get('HS_FUSION_DEPTH', '50'))
+
+
+class SearchResources(NamedTuple):
+    """
+    Everything a search reads besides the model. Never mutated: a reload builds
+    a new snapshot and swaps the module-level reference, so queries that
+    already took the old one finish on it.
+    """
+    index: object
+    meta: object
+    config: dict
+    stats: dict
+    signature: tuple
+    hierarchy: object = None
+    lexical: object = None
+    code_index: object = None
+    embeddings: object = None
+
+
+def build_query(name: str = '', category: str = '', description: str = '') -> str:
+    return f"{name or ''} {category or ''} {description or ''}".strip().lower()
+
+
+def search(res: SearchResources, model, queries: List[str], k: int, cache=None) -> List[List[dict]]:
+    """
+    Top-k suggestions per query, in order.
+
+    Purely numeric queries are answered by HS code prefix. Queries in `cache`
+    (a `QueryCache`, optional) are answered from it. The remaining distinct
+    queries are encoded in one call, searched with a single index.search (or
+    one pass through the chapter/heading hierarchy) and, when `res` has a
+    BM25 index, fused with it.
+    """
+    generation = cache.generation if cache is not None else None
+    results = [None] * len(queries)
+    pending = {}  # query -> cached embedding (or None) for queries that need a search
+    for i, q in enumerate(queries):
+        if q in pending:
+            continue
+        prefix = res.code_index.parse(q)
+        if prefix:
+            code_rows = res.code_index.lookup(prefix, k)
+            if code_rows:
+                results[i] = code_prefix_suggestions(res, code_rows)
+                continue
+        cached = cache.get(q, k) if cache is not None else None
+        if cached is not None and cached[2] >= k:
+            results[i] = cached[1][:k]
+        else:
+            pending[q] = cached[0] if cached is not None else None
+
+    if pending:
+        import numpy as np
+        import faiss
+        pending_queries = list(pending)
+        to_encode = [q for q in pending_queries if pending[q] is None]
+        if to_encode:
+            encoded = model.encode(to_encode, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+            faiss.normalize_L2(encoded)
+            for q, emb in zip(to_encode, encoded):
+                pending[q] = emb
+        emb = np.stack([pending[q] for q in pending_queries])
+        hits = rank(res, pending_queries, emb, k)
+        # Gather every hit's metadata in one vectorized take
+        codes, descriptions = res.meta.gather([row for rows, _ in hits for row in rows])
+        found = {}
+        pos = 0
+        for q, (rows, scores) in zip(pending_queries, hits):
+            n = len(rows)
+            found[q] = [
+                {'hscode': code, 'description': desc, 'score': float(score), 'match': 'semantic'}
+                for code, desc, score in zip(codes[pos:pos + n], descriptions[pos:pos + n], scores)
+            ]
+            pos += n
+            if cache is not None:
+                cache.put(q, pending[q], found[q], k, generation)
+        for i, q in enumerate(queries):
+            if results[i] is None:
+                results[i] = found[q]
+    return results
+
+
+def rank(res: SearchResources, queries: List[str], emb, k: int):
+    """
+    (row ids, scores) per encoded query. Dense hits are fused with BM25 hits
+    by reciprocal rank fusion; the fused order is kept, but every score stays
+    the cosine similarity so it means the same with or without fusion.
+    Numeric queries answered by code prefix never get here (see `search`).
+    """
+    import numpy as np
+    from lexical import reciprocal_rank_fusion
+    depth = max(k, FUSION_DEPTH) if res.lexical is not None else k
+    if res.hierarchy is not None:
+        D, I = res.hierarchy.search(emb, depth, HIER_CHAPTERS, HIER_HEADINGS)
+    else:
+        D, I = res.index.search(emb, depth)
+
+    hits = []
+    for qi, q in enumerate(queries):
+        valid = I[qi] >= 0
+        rows, scores = I[qi][valid].tolist(), D[qi][valid].tolist()
+        lexical_rows = res.lexical.search(q, depth)[0].tolist() if res.lexical is not None else []
+        if lexical_rows:
+            dense = dict(zip(rows, scores))
+            rows = reciprocal_rank_fusion([rows, lexical_rows], RRF_K)[:k]
+            lexical_only = [row for row in rows if row not in dense]
+            if lexical_only:
+                dense.update(zip(lexical_only, (np.asarray(res.embeddings[lexical_only]) @ emb[qi]).tolist()))
+            scores = [dense[row] for row in rows]
+        hits.append((rows[:k], scores[:k]))
+    return hits
+
+
+def code_prefix_suggestions(res: SearchResources, rows) -> List[dict]:
+    """Codes matching a numeric query; no query embedding, so no cosine score."""
+    codes, descriptions = res.meta.gather(rows)
+    return [{'hscode': code, 'description': desc, 'score': None, 'match': 'code_prefix'}
+            for code, desc in zip(codes, descriptions)]
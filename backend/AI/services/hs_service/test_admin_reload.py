@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test cases for /admin/reload access and concurrency (no model or index needed)
+"""
+from fastapi.testclient import TestClient
+
+import app as hs_app
+
+# No `with`: startup (model warm-up) is not run
+client = TestClient(hs_app.app)
+
+
+def test_disabled_without_token():
+    hs_app.ADMIN_TOKEN = None
+    response = client.post('/admin/reload', headers={'X-Admin-Token': ''})
+    print(f"✓ No HS_ADMIN_TOKEN - status: {response.status_code}")
+    assert response.status_code == 403
+
+
+def test_wrong_token():
+    hs_app.ADMIN_TOKEN = 'secret'
+    try:
+        assert client.post('/admin/reload').status_code == 403
+        assert client.post('/admin/reload', headers={'X-Admin-Token': 'guess'}).status_code == 403
+    finally:
+        hs_app.ADMIN_TOKEN = None
+
+
+def test_conflict_while_reloading():
+    """A second reload gets 409 right away, with or without wait, instead of a 500 or a queued reload"""
+    hs_app.ADMIN_TOKEN = 'secret'
+    failures = hs_app.reload_state['failures']
+    assert hs_app._reload_lock.acquire(blocking=False)
+    try:
+        for wait in ('false', 'true'):
+            response = client.post(f'/admin/reload?wait={wait}', headers={'X-Admin-Token': 'secret'})
+            print(f"✓ Reload in progress, wait={wait} - status: {response.status_code}")
+            assert response.status_code == 409
+        assert hs_app.reload_state['failures'] == failures
+    finally:
+        hs_app._reload_lock.release()
+        hs_app.ADMIN_TOKEN = None
+
+
+if __name__ == '__main__':
+    test_disabled_without_token()
+    test_wrong_token()
+    test_conflict_while_reloading()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test cases for inference backpressure: a full executor answers 503 (no model or index needed)
+"""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app as hs_app
+from inference_executor import InferenceExecutor
+
+# No `with`: startup (model warm-up) is not run
+client = TestClient(hs_app.app)
+
+
+def test_overloaded_returns_503():
+    """With max_pending calls queued or running, further requests get 503 + Retry-After and are counted"""
+    release = threading.Event()
+
+    def blocking_search(queries, k):
+        release.wait(10)
+        return [[{'hscode': '010121', 'description': 'horses', 'score': 0.5, 'match': 'semantic'}] for _ in queries]
+
+    executor = InferenceExecutor(max_workers=1, max_pending=2)
+    saved = hs_app.inference, hs_app._search, hs_app._resources_ready
+    hs_app.inference, hs_app._search, hs_app._resources_ready = executor, blocking_search, lambda: True
+    batch = {'items': [{'name': 'horse', 'k': 1}]}
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(client.post('/suggest-hs/batch', json=batch)))
+               for _ in range(executor.max_pending)]
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 10
+        while executor.stats()['in_flight'] + executor.stats()['queue_depth'] < executor.max_pending:
+            assert time.time() < deadline, 'executor never filled up'
+            time.sleep(0.01)
+        assert executor.stats()['queue_depth'] == 1
+
+        for path, body in (('/suggest-hs/batch', batch), ('/suggest-hs', {'name': 'horse', 'k': 1})):
+            response = client.post(path, json=body)
+            print(f"✓ Saturated {path} - status: {response.status_code}")
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == hs_app.OVERLOAD_RETRY_AFTER
+        assert executor.stats()['rejected'] == 2
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join(10)
+        hs_app.inference, hs_app._search, hs_app._resources_ready = saved
+
+    # The queued requests were served, not dropped, once the worker freed up
+    assert [r.status_code for r in responses] == [200] * executor.max_pending
+    stats = executor.stats()
+    assert stats['completed'] == executor.max_pending and stats['peak_pending'] == executor.max_pending
+    assert stats['in_flight'] == stats['queue_depth'] == 0
+
+
+if __name__ == '__main__':
+    test_overloaded_returns_503()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test cases for micro-batcher backpressure (no model or index needed)
+"""
+import asyncio
+
+from inference_executor import Overloaded
+from micro_batcher import MicroBatcher
+
+
+async def _slow_echo(items):
+    await asyncio.sleep(0.05)
+    return items
+
+
+async def _flood(batcher, n):
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(n)), return_exceptions=True)
+    ok = [r for r in results if not isinstance(r, Exception)]
+    rejected = [r for r in results if isinstance(r, Overloaded)]
+    return ok, rejected
+
+
+def test_flood_of_single_requests_is_rejected():
+    """200 concurrent queries with max_pending=2: items beyond the limit get Overloaded (-> 503)"""
+    batcher = MicroBatcher(_slow_echo, max_batch_size=32, max_wait_ms=0, max_in_flight=1, max_pending=2)
+    ok, rejected = asyncio.run(_flood(batcher, 200))
+    print(f"✓ Flood - OK: {len(ok)} | Overloaded: {len(rejected)}")
+    assert len(ok) == 2, f"Expected 2 accepted, got {len(ok)}"
+    assert len(rejected) == 198, f"Expected 198 rejected, got {len(rejected)}"
+    assert batcher.stats()['rejected'] == 198
+    assert batcher.stats()['items_in_flight'] == 0
+
+
+def test_limit_counts_items_not_batches():
+    """Items waiting behind a running batch count against max_pending"""
+    batcher = MicroBatcher(_slow_echo, max_batch_size=32, max_wait_ms=0, max_in_flight=1, max_pending=10)
+    ok, rejected = asyncio.run(_flood(batcher, 30))
+    print(f"✓ Item limit - OK: {len(ok)} | Overloaded: {len(rejected)}")
+    assert ok == list(range(10))
+    assert len(rejected) == 20
+
+
+def test_unbounded_without_limit():
+    batcher = MicroBatcher(_slow_echo, max_batch_size=32, max_wait_ms=0, max_in_flight=1)
+    ok, rejected = asyncio.run(_flood(batcher, 200))
+    assert len(ok) == 200 and not rejected
+
+
+if __name__ == '__main__':
+    test_flood_of_single_requests_is_rejected()
+    test_limit_counts_items_not_batches()
+    test_unbounded_without_limit()
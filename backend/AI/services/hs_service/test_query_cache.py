@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Test cases for query cache hit accounting
+"""
+from query_cache import QueryCache
+
+
+def test_smaller_k_is_partial_hit():
+    """An entry searched with a smaller k is returned for its embedding but not counted as a hit"""
+    cache = QueryCache(max_entries=10)
+    assert cache.get('horse', 5) is None
+    cache.put('horse', [0.1, 0.2], ['a', 'b', 'c'], 3, cache.generation)
+
+    assert cache.get('horse', 3)[2] == 3
+    assert cache.get('horse', 1)[1] == ['a', 'b', 'c']
+    embedding, _, cached_k = cache.get('horse', 5)
+    assert embedding == [0.1, 0.2] and cached_k == 3
+
+    stats = cache.stats()
+    print(f"✓ hits: {stats['hits']}, partial: {stats['partial_hits']}, misses: {stats['misses']}")
+    assert (stats['hits'], stats['partial_hits'], stats['misses']) == (2, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+if __name__ == '__main__':
+    test_smaller_k_is_partial_hit()
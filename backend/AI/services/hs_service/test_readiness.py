@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test cases for warm-up retries and failure reporting on /ready (no model or index needed)
+"""
+from fastapi.testclient import TestClient
+
+import app as hs_app
+from common.readiness import FAILED, READY, Readiness
+
+# No `with`: startup (model warm-up) is not run
+client = TestClient(hs_app.app)
+
+
+def test_retry_then_ready():
+    readiness = Readiness('embedding_model')
+    attempts = []
+
+    def load():
+        attempts.append(readiness.snapshot()['components']['embedding_model'])
+        if len(attempts) < 3:
+            raise OSError('download timed out')
+        return 'model'
+
+    assert readiness.track('embedding_model', load, retries=3, backoff_seconds=0.01) == 'model'
+    # The second attempt saw the first failure and its scheduled retry
+    assert attempts[1]['attempts'] == 2
+    component = readiness.snapshot()['components']['embedding_model']
+    print(f"✓ Loaded after {component['attempts']} attempts")
+    assert component['state'] == READY and 'retry_in_seconds' not in component
+    assert readiness.ready
+
+
+def test_terminal_failure_on_ready():
+    """After the last retry /ready reports which component failed and why"""
+    readiness = Readiness('embedding_model', 'hs_index')
+    try:
+        readiness.track('embedding_model', lambda: 1 / 0, retries=1, backoff_seconds=0.01)
+    except ZeroDivisionError:
+        readiness.fail_pending('not loaded: embedding model failed')
+    original, hs_app.readiness = hs_app.readiness, readiness
+    try:
+        response = client.get('/ready')
+    finally:
+        hs_app.readiness = original
+    body = response.json()
+    print(f"✓ Failed warm-up - status: {response.status_code}, failed: {body['failed']}")
+    assert response.status_code == 503
+    assert body['failed'] == ['embedding_model', 'hs_index']
+    model = body['components']['embedding_model']
+    assert model['state'] == FAILED and model['attempts'] == 2
+    assert model['detail'] == 'division by zero' and 'retry_in_seconds' not in model
+
+
+if __name__ == '__main__':
+    test_retry_then_ready()
+    test_terminal_failure_on_ready()